@@ -0,0 +1,117 @@
+"""
+Helpers shared by the benchmark scripts in this directory.
+"""
+
+import json
+import math
+import os
+import resource
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values: list[float], p: float) -> float:
+    # Nearest-rank method; good enough for the sample sizes used here
+    if not values:
+        return 0.0
+
+    ordered = sorted(values)
+    rank = max(1, math.ceil(p / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(values: list[float]) -> dict:
+    # values are expected to be in seconds, the summary is in milliseconds
+    if not values:
+        return {'count': 0}
+
+    return {
+        'count': len(values),
+        'min_ms': round(min(values) * 1000, 3),
+        'mean_ms': round(statistics.fmean(values) * 1000, 3),
+        'p50_ms': round(percentile(values, 50) * 1000, 3),
+        'p90_ms': round(percentile(values, 90) * 1000, 3),
+        'p99_ms': round(percentile(values, 99) * 1000, 3),
+        'max_ms': round(max(values) * 1000, 3),
+    }
+
+
+def parse_size(value: str) -> int:
+    # Accepts sizes like "512", "64k", "100m" or "2g"
+    units = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+def payload_chunks(size: int, chunk_size: int = 1024 * 1024):
+    # Generates a request body of the given size without holding it in memory
+    chunk = b'\0' * chunk_size
+    remaining = size
+    while remaining > 0:
+        yield chunk[:min(chunk_size, remaining)]
+        remaining -= chunk_size
+
+
+def throughput(total_bytes: int, seconds: float) -> float:
+    # MiB/s
+    if seconds <= 0:
+        return 0.0
+    return round(total_bytes / seconds / 1024 ** 2, 2)
+
+
+def run_concurrently(label: str, function, jobs: list[tuple], concurrency: int) -> tuple[list, float, int]:
+    # Runs function(*job) for all jobs using a thread pool
+    # Returns the results of all successful jobs, the elapsed time and the number of failed jobs
+    results = []
+    errors = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [executor.submit(function, *job) for job in jobs]
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                print(f'{label} error: {e}')
+                errors += 1
+    return results, time.perf_counter() - start, errors
+
+
+def raise_nofile_limit() -> int:
+    # Every connection requires a file descriptor; use the hard limit
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard != resource.RLIM_INFINITY and soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        soft = hard
+    return soft
+
+
+def get_git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_summary(title: str, summary: dict):
+    print(f'{title}:')
+    for key, value in summary.items():
+        print(f'  {key:<12} {value}')
+
+
+def write_report(path: str, report: dict):
+    report.setdefault('commit', get_git_commit())
+
+    with open(path, 'w') as file:
+        json.dump(report, file, indent=2)
+        file.write('\n')
+
+    print(f'Report written to {path}')
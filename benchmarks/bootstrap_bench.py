@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+
+"""
+Measures the startup cost of the bootstrap scripts inside docker/scripts and detects regressions between commits.
+
+Phases:
+  generate          generate-config-files.py for every fixture environment (fixtures/bootstrap/env/*.env)
+  setup-databases   setup-databases.py against a stand-in database, once for the first start and once for a restart
+  watch-controller  watch_controller() of start.py with a fake seafile-controller process that exits after a few seconds
+
+Every run happens inside a fresh interpreter and reports the wall time, the import time (-X importtime),
+the number of spawned processes and database round trips and the peak memory usage (max RSS).
+Modules of the base image (utils, bootstrap, upgrade) are replaced by stand-ins if they are not importable.
+
+    ./bootstrap_bench.py --repeat 10 --report before.json
+    ./bootstrap_bench.py --repeat 10 --baseline before.json
+
+Use --db-latency to simulate the network round trip to the database (the stand-in answers immediately by default).
+Use --db-host to run setup-databases.py against a throwaway MariaDB server instead of the stand-in. This requires PyMySQL;
+the ccnet_db, seafile_db and seahub_db databases are dropped before every first start:
+
+    docker run --rm -d -p 3306:3306 -e MARIADB_ROOT_PASSWORD=secret mariadb:10.11
+    ./bootstrap_bench.py --phases setup-databases --db-host 127.0.0.1 --db-password secret
+"""
+
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchlib import summarize, write_report
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+FIXTURES_DIR = os.path.join(BENCHMARK_DIR, 'fixtures', 'bootstrap')
+RUNNER = os.path.join(FIXTURES_DIR, 'runner.py')
+SCRIPTS_DIR = os.path.join(BENCHMARK_DIR, '..', 'docker', 'scripts')
+COMPOSE_DIR = os.path.join(BENCHMARK_DIR, '..', 'compose')
+
+PHASES = ['generate', 'setup-databases', 'watch-controller']
+
+DATABASES = ['ccnet_db', 'seafile_db', 'seahub_db']
+
+# Printed by the runner after its own imports, so that only the imports of the script are counted
+IMPORTTIME_MARKER = 'bootstrap-bench: start'
+
+# Differences below these values are considered to be noise
+MIN_SECONDS_DIFFERENCE = 0.01
+MIN_RSS_KB_DIFFERENCE = 1024
+
+
+def load_env(path: str) -> dict[str, str]:
+    env = {}
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            env[key.strip()] = value.strip().strip('\'"')
+    return env
+
+
+def base_env() -> dict[str, str]:
+    # Start from a clean environment so that variables of the current shell do not change the results
+    return {key: os.environ[key] for key in ('PATH', 'HOME', 'LANG', 'TMPDIR') if key in os.environ}
+
+
+def parse_importtime(output: str) -> tuple[float, list[tuple[str, float]]]:
+    # Returns the total import time (ms) and the slowest top-level imports
+    lines = output.split(IMPORTTIME_MARKER, 1)[-1].splitlines()
+    top_level = []
+    for line in lines:
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        _, cumulative, package = line[len('import time:'):].split('|')
+        # Nested imports are indented by two spaces per level
+        if len(package) - len(package.lstrip()) == 1:
+            top_level.append((package.strip(), int(cumulative) / 1000))
+
+    slowest = sorted(top_level, key=lambda item: item[1], reverse=True)[:5]
+    return round(sum(ms for _, ms in top_level), 3), [(name, round(ms, 3)) for name, ms in slowest]
+
+
+def run_phase(config: dict, env: dict[str, str], workdir: str) -> dict:
+    stats_path = os.path.join(workdir, 'stats.json')
+    log_path = os.path.join(workdir, 'output.log')
+    config = dict(config, stats_path=stats_path, modules_dir=os.path.join(FIXTURES_DIR, 'modules'))
+
+    env = dict(env, BOOTSTRAP_BENCH_CONFIG=json.dumps(config))
+
+    with open(log_path, 'w') as log:
+        start = time.perf_counter()
+        process = subprocess.Popen([sys.executable, '-X', 'importtime', RUNNER], env=env, stdout=log, stderr=log, cwd=workdir)
+        process.wait()
+        wall = time.perf_counter() - start
+
+    with open(log_path, 'r') as log:
+        output = log.read()
+
+    if not os.path.exists(stats_path):
+        raise RuntimeError(f'Runner failed (exit code {process.returncode}):\n{output[-2000:]}')
+
+    with open(stats_path, 'r') as file:
+        stats = json.load(file)
+    os.unlink(stats_path)
+
+    import_ms, slowest_imports = parse_importtime(output)
+
+    stats.update({
+        'wall_seconds': wall,
+        'import_ms': import_ms,
+        'slowest_imports': slowest_imports,
+        'output': output,
+    })
+    return stats
+
+
+def aggregate(runs: list[dict], expected_exit_code: int) -> dict:
+    last = runs[-1]
+    result = {
+        'ok': all(run['exit_code'] == expected_exit_code for run in runs),
+        'exit_code': last['exit_code'],
+        'wall': summarize([run['wall_seconds'] for run in runs]),
+        'load': summarize([run['load_seconds'] for run in runs]),
+        'run': summarize([run['run_seconds'] for run in runs]),
+        # The minimum is the least noisy estimate of the import cost
+        'import_ms': min(run['import_ms'] for run in runs),
+        'slowest_imports': last['slowest_imports'],
+        'max_rss_kb': max(run['max_rss_kb'] for run in runs),
+        # The counters are deterministic, so the last run is representative
+        'subprocesses': last['subprocesses'],
+        'db_connections': last['db_connections'],
+        'db_round_trips': last['db_round_trips'],
+    }
+
+    if not result['ok']:
+        failed = next(run for run in runs if run['exit_code'] != expected_exit_code)
+        lines = [line for line in failed['output'].splitlines() if not line.startswith('import time:')]
+        result['error'] = '\n'.join(lines[-20:])
+
+    return result
+
+
+def run_generate(args, workdir: str) -> dict:
+    results = {}
+    for env_path in sorted(glob.glob(os.path.join(FIXTURES_DIR, 'env', '*.env'))):
+        name = os.path.splitext(os.path.basename(env_path))[0]
+        env = dict(base_env(), **load_env(env_path))
+        runs = []
+        for _ in range(args.repeat):
+            # Every run starts with an empty root directory (like a new container)
+            root = os.path.join(workdir, 'root')
+            shutil.rmtree(root, ignore_errors=True)
+            shutil.copytree(os.path.join(FIXTURES_DIR, 'root'), root)
+            os.makedirs(os.path.join(root, 'tmp'), exist_ok=True)
+            for file in ('seahub_settings_overrides.py', 'seafile_roles.json'):
+                shutil.copy(os.path.join(COMPOSE_DIR, file), os.path.join(root, 'tmp', file))
+
+            config = {
+                'phase': 'generate',
+                'script': os.path.join(args.scripts_dir, 'generate-config-files.py'),
+                'scripts_dir': args.scripts_dir,
+                'root': root,
+            }
+            runs.append(run_phase(config, env, workdir))
+        results[f'generate/{name}'] = aggregate(runs, expected_exit_code=0)
+    return results
+
+
+def drop_databases(args):
+    import pymysql
+
+    connection = pymysql.connect(host=args.db_host, port=3306, user=args.db_user, passwd=args.db_password)
+    with connection.cursor() as cursor:
+        for database in DATABASES:
+            cursor.execute(f'DROP DATABASE IF EXISTS `{database}`')
+    connection.close()
+
+
+def run_setup_databases(args, workdir: str) -> dict:
+    env = dict(base_env(), **load_env(os.path.join(FIXTURES_DIR, 'env', 'minimal.env')))
+    env['BOOTSTRAP_BENCH_INSTALL_DIR'] = args.install_dir
+
+    config = {
+        'phase': 'setup-databases',
+        'script': os.path.join(args.scripts_dir, 'setup-databases.py'),
+        'scripts_dir': args.scripts_dir,
+    }
+
+    state_path = os.path.join(workdir, 'db-state.json')
+    if args.db_host:
+        env.update(DB_HOST=args.db_host, DB_USER=args.db_user, DB_ROOT_PASSWD=args.db_password)
+    else:
+        config['prepend_path'] = [os.path.join(FIXTURES_DIR, 'standin_db')]
+        env.update(BOOTSTRAP_BENCH_DB_STATE=state_path, BOOTSTRAP_BENCH_DB_LATENCY=str(args.db_latency))
+
+    fresh = []
+    restart = []
+    for _ in range(args.repeat):
+        if args.db_host:
+            drop_databases(args)
+        elif os.path.exists(state_path):
+            os.unlink(state_path)
+
+        fresh.append(run_phase(config, env, workdir))
+        restart.append(run_phase(config, env, workdir))
+
+    return {
+        'setup-databases/fresh': aggregate(fresh, expected_exit_code=0),
+        'setup-databases/restart': aggregate(restart, expected_exit_code=0),
+    }
+
+
+def run_watch_controller(args, workdir: str) -> dict:
+    env = dict(base_env(), **load_env(os.path.join(FIXTURES_DIR, 'env', 'minimal.env')))
+    env['BOOTSTRAP_BENCH_INSTALL_DIR'] = args.install_dir
+
+    config = {
+        'phase': 'watch-controller',
+        'script': os.path.join(args.scripts_dir, 'start.py'),
+        'scripts_dir': args.scripts_dir,
+        'controller': os.path.join(FIXTURES_DIR, 'seafile-controller'),
+        'controller_lifetime': args.controller_lifetime,
+    }
+
+    # watch_controller() takes a while to notice the exit, so this phase is only run once
+    run = run_phase(config, env, workdir)
+    result = aggregate([run], expected_exit_code=1)
+    result['controller_lifetime_seconds'] = args.controller_lifetime
+    result['detection_seconds'] = round(run['detection_seconds'], 3) if run['detection_seconds'] is not None else None
+    result['cpu_seconds'] = round(run['cpu_seconds'], 3)
+    return result
+
+
+def print_phase(name: str, result: dict):
+    status = 'ok' if result['ok'] else f'FAILED (exit code {result["exit_code"]})'
+    print(f'{name}: {status}')
+    print(f'  wall         min {result["wall"].get("min_ms")} ms, p50 {result["wall"].get("p50_ms")} ms (load {result["load"].get("p50_ms")} ms, run {result["run"].get("p50_ms")} ms)')
+    print(f'  imports      {result["import_ms"]} ms ({", ".join(f"{name} {ms}" for name, ms in result["slowest_imports"][:3])})')
+    print(f'  max RSS      {result["max_rss_kb"]} KB')
+    print(f'  processes    {result["subprocesses"]}')
+    print(f'  DB           {result["db_connections"]} connections, {result["db_round_trips"]} round trips')
+    if 'detection_seconds' in result:
+        print(f'  detection    {result["detection_seconds"]} s after the controller exited ({result["cpu_seconds"]} s CPU)')
+    if 'error' in result:
+        print('  ' + result['error'].replace('\n', '\n  '))
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list[str]:
+    # Returns a list of regressions compared to the baseline report
+    regressions = []
+    for name, result in report['phases'].items():
+        old = baseline.get('phases', {}).get(name)
+        if old is None:
+            continue
+
+        checks = [
+            # Compare the fastest runs, since the other ones mostly differ because of the load of the machine
+            ('wall time', old['wall'].get('min_ms', 0) / 1000, result['wall'].get('min_ms', 0) / 1000, MIN_SECONDS_DIFFERENCE, 's'),
+            ('import time', old['import_ms'] / 1000, result['import_ms'] / 1000, MIN_SECONDS_DIFFERENCE, 's'),
+            ('max RSS', old['max_rss_kb'], result['max_rss_kb'], MIN_RSS_KB_DIFFERENCE, 'KB'),
+        ]
+        if result.get('detection_seconds') is not None and old.get('detection_seconds') is not None:
+            checks.append(('detection time', old['detection_seconds'], result['detection_seconds'], 1.0, 's'))
+
+        for label, before, after, min_difference, unit in checks:
+            if after > before * (1 + tolerance) and after - before > min_difference:
+                regressions.append(f'{name}: {label} increased from {before:g} {unit} to {after:g} {unit}')
+
+        # Counters must not increase at all
+        for counter in ('subprocesses', 'db_connections', 'db_round_trips'):
+            if result[counter] > old[counter]:
+                regressions.append(f'{name}: {counter} increased from {old[counter]} to {result[counter]}')
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--phases', default=','.join(PHASES), help=f'Comma-separated list of phases (default: {",".join(PHASES)})')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of runs of the generate and setup-databases phases')
+    parser.add_argument('--scripts-dir', default=os.path.normpath(SCRIPTS_DIR), help='Directory containing the bootstrap scripts')
+    parser.add_argument('--install-dir', default=os.path.join(FIXTURES_DIR, 'install'), help='Directory containing the SQL files (e.g. /opt/seafile/seafile-server-latest)')
+    parser.add_argument('--db-latency', type=float, default=0.0, help='Simulated round trip time of the stand-in database (ms)')
+    parser.add_argument('--db-host', help='Use this MariaDB server instead of the stand-in database (port 3306)')
+    parser.add_argument('--db-user', default='root')
+    parser.add_argument('--db-password', default='')
+    parser.add_argument('--controller-lifetime', type=float, default=5.0, help='Seconds until the fake seafile-controller exits')
+    parser.add_argument('--baseline', help='Compare the results with this report and exit with code 1 on regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed relative increase of times and memory usage compared to the baseline')
+    parser.add_argument('--report', help='Write a JSON report to this file')
+    args = parser.parse_args()
+
+    phases = [phase.strip() for phase in args.phases.split(',') if phase.strip()]
+    for phase in phases:
+        if phase not in PHASES:
+            parser.error(f'Unknown phase "{phase}"')
+
+    args.scripts_dir = os.path.abspath(args.scripts_dir)
+    args.install_dir = os.path.abspath(args.install_dir)
+
+    report = {
+        'benchmark': 'bootstrap_bench',
+        'python': sys.version.split()[0],
+        'repeat': args.repeat,
+        'database': args.db_host or f'stand-in ({args.db_latency} ms latency)',
+        'phases': {},
+    }
+
+    runners = {'generate': run_generate, 'setup-databases': run_setup_databases, 'watch-controller': run_watch_controller}
+
+    with tempfile.TemporaryDirectory(prefix='bootstrap-bench-') as workdir:
+        for phase in phases:
+            results = runners[phase](args, workdir)
+            if phase == 'watch-controller':
+                results = {phase: results}
+            for name, result in results.items():
+                print_phase(name, result)
+            report['phases'].update(results)
+
+    if args.report:
+        write_report(args.report, report)
+
+    failed = [name for name, result in report['phases'].items() if not result['ok']]
+    if failed:
+        print(f'Failed phases: {", ".join(failed)}')
+        sys.exit(1)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)
+
+        regressions = compare(report, baseline, args.tolerance)
+        print(f'Compared with {args.baseline} (commit {baseline.get("commit", "unknown")}):')
+        for regression in regressions:
+            print(f'  {regression}')
+        if regressions:
+            sys.exit(1)
+        print('  No regressions')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+
+"""
+Measures the latency of regular clients while a single client sends a burst of requests.
+
+Every regular client sends requests at a steady pace, while the burst client keeps many requests in flight
+(like a misbehaving sync client or script). Without rate limiting, the burst occupies all workers and the
+tail latency of the regular clients grows with the length of the burst; with rate limiting, the excess
+requests of the burst client are rejected (429) and the tail latency stays bounded.
+
+Clients are identified by their X-Forwarded-For header. Run against the bundled stand-in server (which
+processes a limited number of requests in parallel, like seahub's gunicorn workers), without and with the
+limits that NGINX_RATE_LIMIT_ENABLED generates:
+
+    ./burst_load.py serve --port 8000
+    ./burst_load.py serve --port 8000 --limit-rate 10r/s --limit-burst 50 --limit-conn 10
+    ./burst_load.py run --url http://127.0.0.1:8000/api2/ping/
+
+Or against a real deployment through NGINX (from an address listed in NGINX_TRUSTED_PROXIES):
+
+    ./burst_load.py run --url http://127.0.0.1/api2/ping/
+"""
+
+import argparse
+import http.client
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+from benchlib import print_summary, raise_nofile_limit, summarize, write_report
+
+# Address of the burst client; regular clients use 10.0.1.x
+BURST_CLIENT = '10.0.0.1'
+
+
+def parse_rate(value: str) -> float:
+    # NGINX syntax: "10r/s" or "600r/m"
+    number, unit = value.strip().lower().split('r/')
+    return float(number) / (60 if unit == 'm' else 1)
+
+
+class Limiter:
+    """
+    Per-client request rate (limit_req with burst and nodelay) and number of requests in flight (limit_conn).
+    """
+
+    def __init__(self, rate: float, burst: int, connections: int):
+        self.rate = rate
+        self.burst = burst
+        self.connections = connections
+        self.lock = threading.Lock()
+        # Client => (excess requests, time of the last accepted request)
+        self.excess: dict[str, tuple[float, float]] = {}
+        self.in_flight: dict[str, int] = {}
+
+    def acquire(self, client: str) -> bool:
+        now = time.monotonic()
+        with self.lock:
+            if self.connections and self.in_flight.get(client, 0) >= self.connections:
+                return False
+
+            if self.rate:
+                excess, last = self.excess.get(client, (0.0, now))
+                excess = max(0.0, excess - (now - last) * self.rate) + 1
+                if excess > self.burst + 1:
+                    return False
+                self.excess[client] = (excess, now)
+
+            self.in_flight[client] = self.in_flight.get(client, 0) + 1
+            return True
+
+    def release(self, client: str):
+        with self.lock:
+            self.in_flight[client] -= 1
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Answers every GET after service_time seconds. The number of requests processed in parallel is limited
+    like seahub's gunicorn workers; requests wait for a free worker.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    workers: threading.Semaphore = threading.Semaphore(5)
+    service_time: float = 0.05
+    limiter: Limiter | None = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def respond(self, status: int, body: bytes):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        client = self.headers.get('X-Forwarded-For', self.client_address[0]).split(',')[0].strip()
+
+        if self.limiter is not None and not self.limiter.acquire(client):
+            self.respond(429, b'{"detail": "Request was throttled."}')
+            return
+
+        try:
+            with self.workers:
+                time.sleep(self.service_time)
+            self.respond(200, b'"pong"')
+        finally:
+            if self.limiter is not None:
+                self.limiter.release(client)
+
+
+class Target:
+    def __init__(self, url: str, token: str, timeout: float):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or '/'
+        if parts.query:
+            self.path += '?' + parts.query
+        self.timeout = timeout
+        self.headers = {}
+        if token:
+            self.headers['Authorization'] = f'Token {token}'
+
+    def connect(self) -> http.client.HTTPConnection:
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+
+class Client:
+    # Sends requests over a persistent connection and records the latency and status of every response
+
+    def __init__(self, target: Target, address: str):
+        self.target = target
+        self.headers = dict(target.headers, **{'X-Forwarded-For': address})
+        self.connection = None
+        self.latencies: list[float] = []
+        self.statuses: dict[str, int] = {}
+
+    def request(self):
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = self.target.connect()
+            self.connection.request('GET', self.target.path, headers=self.headers)
+            response = self.connection.getresponse()
+            response.read()
+            status = str(response.status)
+        except (OSError, http.client.HTTPException):
+            status = 'error'
+            self.close()
+        elapsed = time.perf_counter() - start
+
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status not in ('429', 'error'):
+            self.latencies.append(elapsed)
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def run_client(client: Client, deadline: float, interval: float):
+    # interval = 0 sends the next request as soon as the previous one has been answered
+    next_request = time.perf_counter()
+    while time.perf_counter() < deadline:
+        client.request()
+        if interval > 0:
+            next_request += interval
+            time.sleep(max(0.0, next_request - time.perf_counter()))
+    client.close()
+
+
+def run_group(clients: list[Client], deadline: float, interval: float) -> list[threading.Thread]:
+    threads = [threading.Thread(target=run_client, args=(client, deadline, interval), daemon=True) for client in clients]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def merge_statuses(clients: list[Client]) -> dict[str, int]:
+    statuses = {}
+    for client in clients:
+        for status, count in client.statuses.items():
+            statuses[status] = statuses.get(status, 0) + count
+    return dict(sorted(statuses.items()))
+
+
+def run(args) -> dict:
+    raise_nofile_limit()
+    target = Target(args.url, args.token, args.timeout)
+
+    server = None
+    if args.standin:
+        configure_standin(args.standin_workers, args.service_time, args.limit_rate, args.limit_burst, args.limit_conn)
+        server = ThreadingHTTPServer(('127.0.0.1', urlsplit(args.url).port or 80), StandInHandler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    regular_clients = [Client(target, f'10.0.1.{i + 1}') for i in range(args.clients)]
+    # All connections of the burst client share one address
+    burst_clients = [Client(target, BURST_CLIENT) for _ in range(args.burst_concurrency)]
+
+    # Baseline: regular clients only
+    deadline = time.perf_counter() + args.warmup
+    for thread in run_group(regular_clients, deadline, 1 / args.client_rate):
+        thread.join()
+    baseline = summarize([latency for client in regular_clients for latency in client.latencies])
+
+    for client in regular_clients:
+        client.latencies.clear()
+        client.statuses.clear()
+
+    start = time.perf_counter()
+    deadline = start + args.duration
+    threads = run_group(regular_clients, deadline, 1 / args.client_rate)
+    threads += run_group(burst_clients, deadline, 0)
+    for thread in threads:
+        thread.join()
+    seconds = time.perf_counter() - start
+
+    if server is not None:
+        server.shutdown()
+
+    burst_statuses = merge_statuses(burst_clients)
+    report = {
+        'benchmark': 'burst_load',
+        'url': args.url,
+        'duration': args.duration,
+        'clients': args.clients,
+        'client_rate': args.client_rate,
+        'burst_concurrency': args.burst_concurrency,
+        'standin': {
+            'workers': args.standin_workers,
+            'service_time': args.service_time,
+            'limit_rate': args.limit_rate,
+            'limit_burst': args.limit_burst,
+            'limit_conn': args.limit_conn,
+        } if args.standin else None,
+        'baseline': {
+            'latency': baseline,
+        },
+        'regular': {
+            'statuses': merge_statuses(regular_clients),
+            'latency': summarize([latency for client in regular_clients for latency in client.latencies]),
+        },
+        'burst': {
+            'statuses': burst_statuses,
+            'accepted_per_second': round(burst_statuses.get('200', 0) / seconds, 2),
+            'latency': summarize([latency for client in burst_clients for latency in client.latencies]),
+        },
+    }
+
+    print_summary('Regular clients without burst (latency)', report['baseline']['latency'])
+    print_summary('Regular clients during burst (latency)', report['regular']['latency'])
+    print(f'Regular clients statuses: {report["regular"]["statuses"]}')
+    print(f'Burst client statuses: {burst_statuses} ({report["burst"]["accepted_per_second"]} accepted requests/s)')
+
+    return report
+
+
+def configure_standin(workers: int, service_time: float, limit_rate: str | None, limit_burst: int, limit_conn: int):
+    StandInHandler.workers = threading.Semaphore(workers)
+    StandInHandler.service_time = service_time
+    if limit_rate or limit_conn:
+        StandInHandler.limiter = Limiter(parse_rate(limit_rate) if limit_rate else 0.0, limit_burst, limit_conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_standin_arguments(subparser, prefix: str = ''):
+        subparser.add_argument(f'--{prefix}workers', dest='standin_workers', type=int, default=5, help='Number of requests processed in parallel')
+        subparser.add_argument('--service-time', type=float, default=0.05, help='Seconds to process a request')
+        subparser.add_argument('--limit-rate', help='Requests per client (e.g. 10r/s, like NGINX_RATE_LIMIT_API)')
+        subparser.add_argument('--limit-burst', type=int, default=50, help='Burst size of --limit-rate')
+        subparser.add_argument('--limit-conn', type=int, default=0, help='Requests in flight per client (0: unlimited)')
+
+    serve_parser = subparsers.add_parser('serve', help='Run the stand-in server')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8000)
+    add_standin_arguments(serve_parser)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmark')
+    run_parser.add_argument('--url', default='http://127.0.0.1:8000/api2/ping/')
+    run_parser.add_argument('--token', default='', help='API token sent by all clients')
+    run_parser.add_argument('--clients', type=int, default=4, help='Number of regular clients')
+    run_parser.add_argument('--client-rate', type=float, default=2.0, help='Requests per second of each regular client')
+    run_parser.add_argument('--burst-concurrency', type=int, default=50, help='Requests in flight of the burst client')
+    run_parser.add_argument('--duration', type=float, default=20.0, help='Seconds')
+    run_parser.add_argument('--warmup', type=float, default=5.0, help='Seconds of regular traffic before the burst')
+    run_parser.add_argument('--timeout', type=float, default=60.0)
+    run_parser.add_argument('--standin', action='store_true', help='Start the stand-in server inside this process')
+    add_standin_arguments(run_parser, prefix='standin-')
+    run_parser.add_argument('--report', help='Write a JSON report to this file')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        configure_standin(args.standin_workers, args.service_time, args.limit_rate, args.limit_burst, args.limit_conn)
+        server = ThreadingHTTPServer((args.host, args.port), StandInHandler)
+        server.daemon_threads = True
+        print(f'Stand-in server listening on {args.host}:{args.port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report = run(args)
+    if args.report:
+        write_report(args.report, report)
+
+
+if __name__ == '__main__':
+    main()
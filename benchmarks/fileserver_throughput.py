@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+
+"""
+Measures upload/download throughput and latency of the fileserver (/seafhttp).
+
+Runs concurrent uploads (multipart, like the web interface) followed by downloads of the uploaded files.
+Run against the bundled stand-in server (which discards uploads and returns zeros on download):
+
+    ./fileserver_throughput.py serve --port 8082
+    ./fileserver_throughput.py run --url http://127.0.0.1:8082/ --size 2g --files 8 --concurrency 4
+
+Or through NGINX, with the stand-in listening on 127.0.0.1:8082:
+
+    ./fileserver_throughput.py run --url http://127.0.0.1/seafhttp/ --size 2g
+
+Or against a real deployment (upload/download links are requested through the API):
+
+    ./fileserver_throughput.py run --server https://seafile.example.com --api-token <token> --repo-id <repo-id>
+"""
+
+import argparse
+import http.client
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+from benchlib import parse_size, payload_chunks, print_summary, run_concurrently, summarize, throughput, write_report
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Mimics the fileserver's upload-api/files endpoints. Only the size of uploaded files is stored.
+    The number of requests processed in parallel is limited like the fileserver's worker threads.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    sizes: dict[str, int] = {}
+    workers: threading.Semaphore = threading.Semaphore(10)
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_empty(self, status: int):
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def do_POST(self):
+        if not self.path.startswith('/upload-api/'):
+            self.send_empty(404)
+            return
+
+        with self.workers:
+            remaining = int(self.headers.get('Content-Length', 0))
+            received = 0
+            name = None
+            while remaining > 0:
+                data = self.rfile.read(min(CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                if name is None:
+                    match = re.search(rb'filename="([^"]+)"', data)
+                    name = match.group(1).decode() if match else str(uuid.uuid4())
+                received += len(data)
+                remaining -= len(data)
+
+            # The multipart overhead is negligible compared to the file size
+            self.sizes[name] = received
+
+            body = json.dumps([{'name': name, 'size': received}]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def do_GET(self):
+        name = self.path.rsplit('/', 1)[-1]
+        size = self.sizes.get(name)
+        if not self.path.startswith('/files/') or size is None:
+            self.send_empty(404)
+            return
+
+        with self.workers:
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(size))
+            self.end_headers()
+            for chunk in payload_chunks(size, CHUNK_SIZE):
+                self.wfile.write(chunk)
+
+
+def connect(url: str, timeout: float) -> tuple[http.client.HTTPConnection, str]:
+    parts = urlsplit(url)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+    if parts.scheme == 'https':
+        return http.client.HTTPSConnection(parts.hostname, parts.port, timeout=timeout), path
+    return http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout), path
+
+
+class StandInLinks:
+    def __init__(self, url: str):
+        self.url = url if url.endswith('/') else url + '/'
+
+    def upload_link(self) -> str:
+        return f'{self.url}upload-api/{uuid.uuid4()}?ret-json=1'
+
+    def download_link(self, name: str) -> str:
+        return f'{self.url}files/{uuid.uuid4()}/{quote(name)}'
+
+
+class APILinks:
+    """
+    Requests upload/download links from seahub's web API (as the desktop/web clients do)
+    """
+
+    def __init__(self, server: str, api_token: str, repo_id: str, timeout: float):
+        self.server = server.rstrip('/')
+        self.headers = {'Authorization': f'Token {api_token}', 'Accept': 'application/json'}
+        self.repo_id = repo_id
+        self.timeout = timeout
+
+    def request(self, path: str) -> str:
+        connection, _ = connect(self.server, self.timeout)
+        connection.request('GET', path, headers=self.headers)
+        response = connection.getresponse()
+        body = response.read()
+        connection.close()
+        if response.status != 200:
+            raise RuntimeError(f'GET {path} failed with status {response.status}')
+        return json.loads(body)
+
+    def upload_link(self) -> str:
+        return self.request(f'/api2/repos/{self.repo_id}/upload-link/?p=/') + '?ret-json=1'
+
+    def download_link(self, name: str) -> str:
+        return self.request(f'/api2/repos/{self.repo_id}/file/?p=/{quote(name)}')
+
+
+def upload(links, name: str, size: int, timeout: float) -> float:
+    boundary = uuid.uuid4().hex
+    preamble = (
+        f'--{boundary}\r\n'
+        'Content-Disposition: form-data; name="parent_dir"\r\n\r\n/\r\n'
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="file"; filename="{name}"\r\n'
+        'Content-Type: application/octet-stream\r\n\r\n'
+    ).encode()
+    epilogue = f'\r\n--{boundary}--\r\n'.encode()
+
+    def body():
+        yield preamble
+        yield from payload_chunks(size, CHUNK_SIZE)
+        yield epilogue
+
+    connection, path = connect(links.upload_link(), timeout)
+    headers = {
+        'Content-Type': f'multipart/form-data; boundary={boundary}',
+        'Content-Length': str(len(preamble) + size + len(epilogue)),
+    }
+
+    start = time.perf_counter()
+    connection.request('POST', path, body=body(), headers=headers)
+    response = connection.getresponse()
+    response.read()
+    elapsed = time.perf_counter() - start
+    connection.close()
+
+    if response.status != 200:
+        raise RuntimeError(f'Upload of {name} failed with status {response.status}')
+    return elapsed
+
+
+def download(links, name: str, timeout: float) -> tuple[float, int]:
+    connection, path = connect(links.download_link(name), timeout)
+
+    start = time.perf_counter()
+    connection.request('GET', path)
+    response = connection.getresponse()
+    received = 0
+    while True:
+        data = response.read(CHUNK_SIZE)
+        if not data:
+            break
+        received += len(data)
+    elapsed = time.perf_counter() - start
+    connection.close()
+
+    if response.status != 200:
+        raise RuntimeError(f'Download of {name} failed with status {response.status}')
+    return elapsed, received
+
+
+def run(args) -> dict:
+    size = parse_size(args.size)
+    names = [f'fileserver-benchmark-{uuid.uuid4().hex[:8]}-{i}.bin' for i in range(args.files)]
+
+    server = None
+    if args.server:
+        links = APILinks(args.server, args.api_token, args.repo_id, args.timeout)
+    else:
+        links = StandInLinks(args.url)
+        if args.standin:
+            StandInHandler.workers = threading.Semaphore(args.standin_workers)
+            server = ThreadingHTTPServer(('127.0.0.1', urlsplit(args.url).port or 80), StandInHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    upload_latencies, upload_seconds, upload_errors = run_concurrently(
+        'Upload', upload, [(links, name, size, args.timeout) for name in names], args.concurrency)
+    download_results, download_seconds, download_errors = run_concurrently(
+        'Download', download, [(links, name, args.timeout) for name in names], args.concurrency)
+
+    if server is not None:
+        server.shutdown()
+
+    report = {
+        'benchmark': 'fileserver_throughput',
+        'target': args.server or args.url,
+        'files': args.files,
+        'file_size': size,
+        'concurrency': args.concurrency,
+        'upload': {
+            'errors': upload_errors,
+            'seconds': round(upload_seconds, 3),
+            'throughput_mib_s': throughput(size * len(upload_latencies), upload_seconds),
+            'latency': summarize(upload_latencies),
+        },
+        'download': {
+            'errors': download_errors,
+            'seconds': round(download_seconds, 3),
+            'throughput_mib_s': throughput(sum(received for _, received in download_results), download_seconds),
+            'latency': summarize([latency for latency, _ in download_results]),
+        },
+    }
+
+    for phase in ('upload', 'download'):
+        print(f'{phase.capitalize()}: {report[phase]["throughput_mib_s"]} MiB/s ({report[phase]["errors"]} errors)')
+        print_summary(f'{phase.capitalize()} latency', report[phase]['latency'])
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Run the stand-in fileserver')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8082)
+    serve_parser.add_argument('--workers', type=int, default=10, help='Number of requests processed in parallel (worker_threads)')
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmark')
+    run_parser.add_argument('--url', default='http://127.0.0.1:8082/', help='Base URL of the (stand-in) fileserver')
+    run_parser.add_argument('--server', help='URL of a real Seafile server; requires --api-token and --repo-id')
+    run_parser.add_argument('--api-token', default='')
+    run_parser.add_argument('--repo-id', default='')
+    run_parser.add_argument('--files', type=int, default=8)
+    run_parser.add_argument('--size', default='1g', help='Size of every file (e.g. 512k, 100m, 2g)')
+    run_parser.add_argument('--concurrency', type=int, default=4)
+    run_parser.add_argument('--timeout', type=float, default=36000.0)
+    run_parser.add_argument('--standin', action='store_true', help='Start the stand-in server inside this process')
+    run_parser.add_argument('--standin-workers', type=int, default=10)
+    run_parser.add_argument('--report', help='Write a JSON report to this file')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        StandInHandler.workers = threading.Semaphore(args.workers)
+        server = ThreadingHTTPServer((args.host, args.port), StandInHandler)
+        print(f'Stand-in fileserver listening on {args.host}:{args.port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.server and not (args.api_token and args.repo_id):
+        parser.error('--server requires --api-token and --repo-id')
+
+    report = run(args)
+    if args.report:
+        write_report(args.report, report)
+
+
+if __name__ == '__main__':
+    main()
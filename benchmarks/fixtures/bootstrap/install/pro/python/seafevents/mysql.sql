@@ -0,0 +1,9 @@
+CREATE TABLE IF NOT EXISTS `Activity` (`id` int(11) NOT NULL AUTO_INCREMENT, `op_type` varchar(128) NOT NULL, `op_user` varchar(255) NOT NULL, `obj_type` varchar(128) NOT NULL, `timestamp` datetime NOT NULL, `repo_id` varchar(36) NOT NULL, `commit_id` varchar(40) DEFAULT NULL, `path` text NOT NULL, `detail` text NOT NULL, PRIMARY KEY (`id`), KEY `ix_Activity_timestamp` (`timestamp`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE IF NOT EXISTS `FileAudit` (`eid` int(11) NOT NULL AUTO_INCREMENT, `timestamp` datetime NOT NULL, `etype` varchar(128) NOT NULL, `user` varchar(255) NOT NULL, `ip` varchar(45) NOT NULL, `device` text NOT NULL, `org_id` int(11) NOT NULL, `repo_id` varchar(36) NOT NULL, `file_path` text NOT NULL, PRIMARY KEY (`eid`), KEY `ix_FileAudit_timestamp` (`timestamp`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE IF NOT EXISTS `FileUpdate` (`eid` int(11) NOT NULL AUTO_INCREMENT, `timestamp` datetime NOT NULL, `user` varchar(255) NOT NULL, `org_id` int(11) NOT NULL, `repo_id` varchar(36) NOT NULL, `commit_id` varchar(40) NOT NULL, `file_oper` text NOT NULL, PRIMARY KEY (`eid`), KEY `ix_FileUpdate_timestamp` (`timestamp`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE IF NOT EXISTS `PermAudit` (`eid` int(11) NOT NULL AUTO_INCREMENT, `timestamp` datetime NOT NULL, `etype` varchar(128) NOT NULL, `from_user` varchar(255) NOT NULL, `to` varchar(255) NOT NULL, `org_id` int(11) NOT NULL, `repo_id` varchar(36) NOT NULL, `file_path` text NOT NULL, `permission` varchar(15) NOT NULL, PRIMARY KEY (`eid`), KEY `ix_PermAudit_timestamp` (`timestamp`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE IF NOT EXISTS `UserActivity` (`id` int(11) NOT NULL AUTO_INCREMENT, `username` varchar(255) NOT NULL, `activity_id` int(11) DEFAULT NULL, `timestamp` datetime NOT NULL, PRIMARY KEY (`id`), KEY `idx_username_timestamp` (`username`,`timestamp`), KEY `activity_id` (`activity_id`), CONSTRAINT `UserActivity_ibfk_1` FOREIGN KEY (`activity_id`) REFERENCES `Activity` (`id`) ON DELETE CASCADE) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE IF NOT EXISTS `FileHistory` (`id` int(11) NOT NULL AUTO_INCREMENT, `op_type` varchar(128) NOT NULL, `op_user` varchar(255) NOT NULL, `timestamp` datetime NOT NULL, `repo_id` varchar(36) NOT NULL, `commit_id` varchar(40) DEFAULT NULL, `file_id` char(40) NOT NULL, `file_uuid` char(32) DEFAULT NULL, `path` text NOT NULL, `repo_id_path_md5` varchar(32) DEFAULT NULL, `size` bigint(20) NOT NULL, `old_path` text NOT NULL, PRIMARY KEY (`id`), KEY `ix_FileHistory_timestamp` (`timestamp`), KEY `ix_FileHistory_file_uuid` (`file_uuid`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE IF NOT EXISTS `FileOpsStat` (`id` int(11) NOT NULL AUTO_INCREMENT, `timestamp` datetime NOT NULL, `op_type` varchar(16) NOT NULL, `number` int(11) NOT NULL, `org_id` int(11) NOT NULL, PRIMARY KEY (`id`), KEY `ix_FileOpsStat_timestamp` (`timestamp`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE IF NOT EXISTS `UserTraffic` (`id` int(11) NOT NULL AUTO_INCREMENT, `user` varchar(255) NOT NULL, `timestamp` datetime NOT NULL, `op_type` varchar(48) NOT NULL, `size` bigint(20) NOT NULL, `org_id` int(11) NOT NULL, PRIMARY KEY (`id`), KEY `ix_UserTraffic_timestamp` (`timestamp`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE IF NOT EXISTS `SysTraffic` (`id` int(11) NOT NULL AUTO_INCREMENT, `timestamp` datetime NOT NULL, `op_type` varchar(48) NOT NULL, `size` bigint(20) NOT NULL, `org_id` int(11) NOT NULL, PRIMARY KEY (`id`), KEY `ix_SysTraffic_timestamp` (`timestamp`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,45 @@
+CREATE TABLE `abuse_reports_abusereport` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `admin_log_adminlog` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `api2_token` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `api2_tokenv2` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `avatar_avatar` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `avatar_groupavatar` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `base_clientlogintoken` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `base_commandslastcheck` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `base_devicetoken` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `base_filecomment` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `base_reposecretkey` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `base_userlastlogin` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `base_userstarredfiles` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `captcha_captchastore` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `constance_config` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `contacts_contact` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `django_content_type` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `auth_group` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `auth_permission` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `auth_user` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `django_migrations` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `django_session` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `file_participants_fileparticipant` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `file_tags_filetags` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `institutions_institution` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `invitations_invitation` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `notifications_notification` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `notifications_usernotification` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `options_useroptions` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `organizations_orgmemberquota` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `post_office_email` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `post_office_log` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `registration_registrationprofile` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `repo_tags_repotags` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `revision_tag_tags` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `share_fileshare` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `share_uploadlinkshare` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `share_orgfileshare` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `sysadmin_extra_userloginlog` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `tags_fileuuidmap` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `termsandconditions_termsandconditions` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `two_factor_staticdevice` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `two_factor_totpdevice` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+CREATE TABLE `wiki_wiki` (`id` int(11) NOT NULL AUTO_INCREMENT, `created_at` datetime(6) NOT NULL, PRIMARY KEY (`id`)) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+INSERT INTO `django_migrations` (`app`, `name`, `applied`) VALUES ('admin_log', '0001_initial', '2024-01-01 00:00:00');
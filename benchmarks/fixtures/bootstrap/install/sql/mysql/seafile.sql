@@ -0,0 +1,15 @@
+CREATE TABLE IF NOT EXISTS Branch (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, name VARCHAR(10), repo_id CHAR(41), commit_id CHAR(41), UNIQUE INDEX(repo_id, name)) ENGINE = INNODB;
+CREATE TABLE IF NOT EXISTS FileLocks (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(40) NOT NULL, path TEXT NOT NULL, user_name VARCHAR(255) NOT NULL, lock_time BIGINT, expire BIGINT, KEY(repo_id)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS GarbageRepos (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(36), UNIQUE INDEX(repo_id)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS InnerPubRepo (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(37), permission CHAR(15), UNIQUE INDEX (repo_id)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS Repo (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(37), UNIQUE INDEX (repo_id)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS RepoFileCount (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(36), file_count BIGINT UNSIGNED, UNIQUE INDEX(repo_id)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS RepoGroup (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(37), group_id INTEGER, user_name VARCHAR(255), permission CHAR(15), UNIQUE INDEX (group_id, repo_id), INDEX (repo_id), INDEX (user_name)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS RepoHead (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(37), branch_name VARCHAR(10), UNIQUE INDEX(repo_id)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS RepoInfo (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(36), name VARCHAR(255) NOT NULL, update_time BIGINT, version INTEGER, is_encrypted INTEGER, last_modifier VARCHAR(255), status INTEGER DEFAULT 0, type VARCHAR(10), UNIQUE INDEX(repo_id), INDEX(type)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS RepoOwner (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(37), owner_id VARCHAR(255), UNIQUE INDEX (repo_id), INDEX (owner_id)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS RepoSize (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(37), size BIGINT UNSIGNED, head_id CHAR(41), UNIQUE INDEX (repo_id)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS RepoUserToken (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(37), email VARCHAR(255), token CHAR(41), UNIQUE INDEX(repo_id, token), INDEX(token), INDEX (email)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS SharedRepo (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(37), from_email VARCHAR(255), to_email VARCHAR(255), permission CHAR(15), INDEX (repo_id), INDEX(from_email), INDEX(to_email)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS UserQuota (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, user VARCHAR(255), quota BIGINT, UNIQUE INDEX(user)) ENGINE=INNODB;
+CREATE TABLE IF NOT EXISTS VirtualRepo (id BIGINT NOT NULL PRIMARY KEY AUTO_INCREMENT, repo_id CHAR(36), origin_repo CHAR(36), path TEXT, base_commit CHAR(40), UNIQUE INDEX(repo_id), INDEX(origin_repo)) ENGINE=INNODB;
@@ -0,0 +1,19 @@
+"""
+Stand-in for the bootstrap module of the seafile-pro-mc image (/scripts/bootstrap.py).
+Only used by bootstrap_bench.py if the real module is not importable.
+"""
+
+import os
+
+
+def is_https():
+    return os.environ.get('SEAFILE_SERVER_LETSENCRYPT', 'false').lower() == 'true' \
+        or os.environ.get('FORCE_HTTPS_IN_CONF', 'false').lower() == 'true'
+
+
+def get_proto():
+    return 'https' if is_https() else 'http'
+
+
+def init_seafile_server():
+    pass
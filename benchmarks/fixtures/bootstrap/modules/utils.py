@@ -0,0 +1,42 @@
+"""
+Stand-in for the utils module of the seafile-pro-mc image (/scripts/utils.py).
+Only used by bootstrap_bench.py if the real module is not importable.
+"""
+
+import logging
+import os
+import subprocess
+
+
+def call(*args, check_call=True, **kwargs):
+    cmd = args[0]
+    kwargs.setdefault('shell', isinstance(cmd, str))
+    if check_call:
+        return subprocess.check_call(*args, **kwargs)
+    return subprocess.call(*args, **kwargs)
+
+
+def get_command_output(cmd):
+    shell = not isinstance(cmd, list)
+    return subprocess.check_output(cmd, shell=shell).decode('utf-8')
+
+
+def get_conf(key, default=None):
+    return os.environ.get(key, default)
+
+
+def get_install_dir():
+    return os.environ['BOOTSTRAP_BENCH_INSTALL_DIR']
+
+
+def get_script(script):
+    return os.path.join(get_install_dir(), script)
+
+
+def wait_for_mysql():
+    # The stand-in database is always ready
+    pass
+
+
+def setup_logging():
+    logging.basicConfig(format='[%(asctime)s] %(message)s', level=logging.INFO)
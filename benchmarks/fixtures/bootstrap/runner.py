@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+"""
+Runs a single phase of bootstrap_bench.py inside a fresh interpreter (so that import time and memory
+usage can be measured per phase). The phase is passed as JSON inside BOOTSTRAP_BENCH_CONFIG; the
+counters are written to the file given by "stats_path".
+
+Not meant to be run directly.
+"""
+
+import importlib.util
+import json
+import os
+import resource
+import subprocess
+import sys
+import textwrap
+import threading
+import time
+import traceback
+
+
+def load_script(path: str):
+    # The scripts have dashes in their names, so they can't be imported the usual way
+    name = os.path.splitext(os.path.basename(path))[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_main_block(module, path: str):
+    # Runs the "if __name__ == '__main__':" block of a script that has been loaded as a module
+    with open(path, 'r') as file:
+        source = file.read()
+
+    marker = "if __name__ == '__main__':"
+    if marker not in source:
+        raise RuntimeError(f'{os.path.basename(path)} does not contain a main block')
+
+    code = compile(textwrap.dedent(source.split(marker, 1)[1]), path, 'exec')
+    exec(code, module.__dict__)
+
+
+def remap_paths(module, root: str):
+    # Redirects absolute paths (CONFIG_DIR, NGINX_CONF_PATH, ...) into the temporary root directory
+    # Parent directories are created, since they are part of the container image (e.g. /shared/nginx/conf)
+    for name, value in list(vars(module).items()):
+        if name.isupper() and name.endswith(('_PATH', '_DIR')) and isinstance(value, str) and value.startswith('/'):
+            path = os.path.join(root, value.lstrip('/'))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            setattr(module, name, path)
+
+
+def get_max_rss_kb() -> int:
+    # Peak RSS of this process only; ru_maxrss of the parent's os.wait4() includes the RSS of the forking process
+    try:
+        with open('/proc/self/status', 'r') as file:
+            for line in file:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def count_subprocesses(counters: dict):
+    original = subprocess.Popen.__init__
+
+    def __init__(self, *args, **kwargs):
+        counters['subprocesses'] += 1
+        original(self, *args, **kwargs)
+
+    subprocess.Popen.__init__ = __init__
+
+
+def count_db_commands(counters: dict):
+    # Every command sent to the server (query, select_db, commit, ...) is one round trip
+    try:
+        from pymysql.connections import Connection
+    except ImportError:
+        return
+
+    original_init = Connection.__init__
+    original_execute_command = Connection._execute_command
+
+    def __init__(self, *args, **kwargs):
+        counters['db_connections'] += 1
+        original_init(self, *args, **kwargs)
+
+    def _execute_command(self, *args, **kwargs):
+        counters['db_round_trips'] += 1
+        return original_execute_command(self, *args, **kwargs)
+
+    Connection.__init__ = __init__
+    Connection._execute_command = _execute_command
+
+
+def run_script(config: dict, stats: dict):
+    start = time.perf_counter()
+    module = load_script(config['script'])
+    stats['load_seconds'] = time.perf_counter() - start
+
+    if config.get('root'):
+        remap_paths(module, config['root'])
+
+    count_db_commands(stats)
+
+    start = time.perf_counter()
+    try:
+        run_main_block(module, config['script'])
+    except SystemExit as e:
+        stats['exit_code'] = e.code if isinstance(e.code, int) else 1
+    finally:
+        stats['run_seconds'] = time.perf_counter() - start
+
+
+def run_watch_controller(config: dict, stats: dict):
+    start = time.perf_counter()
+    module = load_script(config['script'])
+    stats['load_seconds'] = time.perf_counter() - start
+
+    controller = subprocess.Popen([config['controller'], str(config['controller_lifetime'])])
+    exited = {}
+
+    def reap():
+        # Reap the controller immediately, since a zombie process would still show up in "ps aux"
+        controller.wait()
+        exited['at'] = time.perf_counter()
+
+    threading.Thread(target=reap, daemon=True).start()
+
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    children_usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    start = time.perf_counter()
+    stats['subprocesses'] = 0
+
+    try:
+        module.watch_controller()
+    except SystemExit as e:
+        stats['exit_code'] = e.code if isinstance(e.code, int) else 1
+
+    detected = time.perf_counter()
+    stats['run_seconds'] = detected - start
+    stats['detection_seconds'] = detected - exited['at'] if 'at' in exited else None
+    stats['cpu_seconds'] = sum(
+        getattr(resource.getrusage(who), field) - getattr(before, field)
+        for who, before in ((resource.RUSAGE_SELF, usage), (resource.RUSAGE_CHILDREN, children_usage))
+        for field in ('ru_utime', 'ru_stime')
+    )
+
+
+def main():
+    # Everything imported after this line is attributed to the script (see parse_importtime() of bootstrap_bench.py)
+    print('bootstrap-bench: start', file=sys.stderr, flush=True)
+
+    config = json.loads(os.environ['BOOTSTRAP_BENCH_CONFIG'])
+
+    # Same lookup order as inside the container: the scripts directory comes first,
+    # the stand-ins for the modules of the base image are only used as a fallback
+    sys.path.insert(0, config['scripts_dir'])
+    sys.path[0:0] = config.get('prepend_path', [])
+    sys.path.append(config['modules_dir'])
+    sys.argv = [config['script']]
+
+    stats = {'exit_code': 0, 'subprocesses': 0, 'db_connections': 0, 'db_round_trips': 0}
+    count_subprocesses(stats)
+
+    try:
+        if config['phase'] == 'watch-controller':
+            run_watch_controller(config, stats)
+        else:
+            run_script(config, stats)
+    except Exception:
+        # Distinguishable from sys.exit(1), which is the expected result of the watch-controller phase
+        traceback.print_exc()
+        stats['exit_code'] = os.EX_SOFTWARE
+    finally:
+        stats['max_rss_kb'] = get_max_rss_kb()
+        with open(config['stats_path'], 'w') as file:
+            json.dump(stats, file)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""
+Stand-in for PyMySQL that is used by bootstrap_bench.py instead of a MariaDB server.
+
+Keeps track of the created databases and tables (inside the JSON file BOOTSTRAP_BENCH_DB_STATE,
+so that a second run behaves like a container restart) and simulates the network round trip
+of every command (BOOTSTRAP_BENCH_DB_LATENCY, in milliseconds).
+"""
+
+from . import err
+from .connections import Connection
+from .cursors import Cursor
+
+
+def connect(*args, **kwargs) -> Connection:
+    return Connection(*args, **kwargs)
+
+
+__all__ = ['Connection', 'Cursor', 'connect', 'err']
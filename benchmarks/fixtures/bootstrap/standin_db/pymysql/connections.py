@@ -0,0 +1,113 @@
+import json
+import os
+import re
+import time
+
+from . import err
+from .cursors import Cursor
+
+COM_QUERY = 0x03
+COM_INIT_DB = 0x02
+COM_PING = 0x0e
+
+CREATE_DATABASE = re.compile(r'^\s*CREATE\s+DATABASE\s+(IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?', re.IGNORECASE)
+CREATE_TABLE = re.compile(r'^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?`?(\w+)`?', re.IGNORECASE)
+TABLE_EXISTS = re.compile(r'information_schema\.tables\b.*\btable_name\s*=\s*\'(\w+)\'', re.IGNORECASE | re.DOTALL)
+
+
+class Connection:
+    def __init__(self, host='localhost', user=None, password='', database=None, port=3306, passwd=None, db=None, **kwargs):
+        self.state_path = os.environ['BOOTSTRAP_BENCH_DB_STATE']
+        self.latency = float(os.environ.get('BOOTSTRAP_BENCH_DB_LATENCY', '0')) / 1000
+        self.db = database or db
+        self.open = True
+
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r') as file:
+                self.databases = json.load(file)
+        else:
+            self.databases = {}
+
+        # Handshake and authentication
+        self._round_trip()
+        self._round_trip()
+
+    def _round_trip(self):
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+    def _save(self):
+        with open(self.state_path, 'w') as file:
+            json.dump(self.databases, file)
+
+    def escape(self, value) -> str:
+        if value is None:
+            return 'NULL'
+        if isinstance(value, (int, float)):
+            return str(value)
+        return "'" + str(value).replace('\\', '\\\\').replace("'", "\\'") + "'"
+
+    def _execute_command(self, command: int, sql: str) -> int:
+        if not self.open:
+            raise err.Error('Already closed')
+
+        self._round_trip()
+
+        if command != COM_QUERY:
+            return 0
+
+        match = CREATE_DATABASE.match(sql)
+        if match:
+            if match.group(2) in self.databases:
+                if not match.group(1):
+                    raise err.ProgrammingError(1007, f"Can't create database '{match.group(2)}'; database exists")
+                return 0
+            self.databases[match.group(2)] = []
+            self._save()
+            return 1
+
+        match = CREATE_TABLE.match(sql)
+        if match:
+            if self.db is None:
+                raise err.OperationalError(1046, 'No database selected')
+            tables = self.databases.setdefault(self.db, [])
+            if match.group(2) in tables:
+                if not match.group(1):
+                    raise err.OperationalError(1050, f"Table '{match.group(2)}' already exists")
+                return 0
+            tables.append(match.group(2))
+            self._save()
+            return 0
+
+        match = TABLE_EXISTS.search(sql)
+        if match:
+            return 1 if match.group(1) in self.databases.get(self.db, []) else 0
+
+        # Other statements (INSERT, ALTER, ...) are accepted without being interpreted
+        return 1 if sql.lstrip().upper().startswith('INSERT') else 0
+
+    def query(self, sql: str) -> int:
+        return self._execute_command(COM_QUERY, sql)
+
+    def select_db(self, db: str):
+        self._execute_command(COM_INIT_DB, db)
+        if db not in self.databases:
+            raise err.OperationalError(1049, f"Unknown database '{db}'")
+        self.db = db
+
+    def cursor(self, cursor=None) -> Cursor:
+        return (cursor or Cursor)(self)
+
+    def commit(self):
+        self._execute_command(COM_QUERY, 'COMMIT')
+
+    def rollback(self):
+        self._execute_command(COM_QUERY, 'ROLLBACK')
+
+    def ping(self, reconnect=True):
+        self._execute_command(COM_PING, '')
+
+    def close(self):
+        if self.open:
+            # COM_QUIT does not wait for a response
+            self.open = False
@@ -0,0 +1,30 @@
+class Cursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rowcount = -1
+
+    def mogrify(self, query: str, args=None) -> str:
+        if args is None:
+            return query
+        if isinstance(args, dict):
+            return query % {key: self.connection.escape(value) for key, value in args.items()}
+        return query % tuple(self.connection.escape(value) for value in args)
+
+    def execute(self, query: str, args=None) -> int:
+        self.rowcount = self.connection.query(self.mogrify(query, args))
+        return self.rowcount
+
+    def fetchone(self):
+        return None
+
+    def fetchall(self):
+        return ()
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,18 @@
+class MySQLError(Exception):
+    pass
+
+
+class Error(MySQLError):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+class OperationalError(DatabaseError):
+    pass
+
+
+class ProgrammingError(DatabaseError):
+    pass
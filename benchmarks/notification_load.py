@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+
+"""
+Websocket load generator for the notification server.
+
+Opens many concurrent websocket connections (like desktop and drive clients do),
+subscribes each one to a repo and measures how long it takes until a broadcast
+event reaches every client.
+
+Run against the bundled stand-in server:
+
+    ./notification_load.py serve --port 8083
+    ./notification_load.py run --url ws://127.0.0.1:8083/ --connections 5000
+
+Or through the generated NGINX configuration (with the stand-in listening on 127.0.0.1:8083):
+
+    ./notification_load.py run --url ws://127.0.0.1/notification --connections 5000
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import sys
+import time
+import uuid
+from urllib.parse import urlsplit
+
+from benchlib import print_summary, raise_nofile_limit, summarize, write_report
+
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+
+
+def encode_frame(payload: bytes, opcode: int = OPCODE_TEXT, mask: bool = False) -> bytes:
+    # Frames sent by clients must be masked (RFC 6455, section 5.3)
+    head = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0x00
+    length = len(payload)
+
+    if length < 126:
+        head.append(mask_bit | length)
+    elif length < 65536:
+        head.append(mask_bit | 126)
+        head += struct.pack('!H', length)
+    else:
+        head.append(mask_bit | 127)
+        head += struct.pack('!Q', length)
+
+    if mask:
+        key = os.urandom(4)
+        head += key
+        payload = bytes(byte ^ key[i % 4] for i, byte in enumerate(payload))
+
+    return bytes(head) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    head = await reader.readexactly(2)
+    opcode = head[0] & 0x0F
+    masked = head[1] & 0x80
+    length = head[1] & 0x7F
+
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+
+    key = await reader.readexactly(4) if masked else None
+    payload = await reader.readexactly(length)
+
+    if key:
+        payload = bytes(byte ^ key[i % 4] for i, byte in enumerate(payload))
+
+    return opcode, payload
+
+
+def accept_key(key: str) -> str:
+    digest = hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()
+    return base64.b64encode(digest).decode()
+
+
+async def read_http_head(reader: asyncio.StreamReader) -> tuple[str, dict[str, str]]:
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+class StandInServer:
+    """
+    Mimics the parts of the notification server that matter for connection handling:
+    websocket upgrades on any path, a /ping endpoint and events that are pushed to all subscribers.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.clients: set[asyncio.StreamWriter] = set()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line, headers = await read_http_head(reader)
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            writer.close()
+            return
+
+        path = request_line.split(' ')[1] if ' ' in request_line else '/'
+        if path.rstrip('/').endswith('/ping') or 'sec-websocket-key' not in headers:
+            body = b'{"ret": "pong"}'
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\nConnection: close\r\n\r\n' % len(body) + body)
+            await writer.drain()
+            writer.close()
+            return
+
+        writer.write((
+            'HTTP/1.1 101 Switching Protocols\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Accept: {accept_key(headers["sec-websocket-key"])}\r\n\r\n'
+        ).encode())
+        await writer.drain()
+
+        self.clients.add(writer)
+
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == OPCODE_CLOSE:
+                    break
+                if opcode == OPCODE_PING:
+                    writer.write(encode_frame(payload, OPCODE_PONG))
+                # Subscribe messages are accepted but not validated (no JWT checks)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    async def broadcast(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            if not self.clients:
+                continue
+
+            frame = encode_frame(json.dumps({
+                'type': 'repo-update',
+                'content': {'repo_id': str(uuid.uuid4()), 'sent': time.time()},
+            }).encode())
+
+            for writer in list(self.clients):
+                writer.write(frame)
+
+            await asyncio.gather(*(writer.drain() for writer in list(self.clients)), return_exceptions=True)
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        asyncio.create_task(self.broadcast())
+        return server
+
+
+class Client:
+    def __init__(self, url: str):
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == 'wss' else 80)
+        self.path = parts.path or '/'
+        self.ssl = parts.scheme == 'wss'
+        self.reader = None
+        self.writer = None
+        self.latencies: list[float] = []
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl or None)
+
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((
+            f'GET {self.path} HTTP/1.1\r\n'
+            f'Host: {self.host}\r\n'
+            'Upgrade: websocket\r\n'
+            'Connection: Upgrade\r\n'
+            f'Sec-WebSocket-Key: {key}\r\n'
+            'Sec-WebSocket-Version: 13\r\n\r\n'
+        ).encode())
+        await self.writer.drain()
+
+        status_line, headers = await read_http_head(self.reader)
+        if ' 101 ' not in status_line or headers.get('sec-websocket-accept') != accept_key(key):
+            raise ConnectionError(f'Unexpected handshake response: {status_line}')
+
+        # Same message format as used by the desktop client
+        subscribe = {'type': 'subscribe', 'content': {'repos': [{'id': str(uuid.uuid4()), 'jwt_token': ''}]}}
+        self.writer.write(encode_frame(json.dumps(subscribe).encode(), mask=True))
+        await self.writer.drain()
+
+    async def receive(self, messages: int):
+        while len(self.latencies) < messages:
+            opcode, payload = await read_frame(self.reader)
+            if opcode == OPCODE_CLOSE:
+                raise ConnectionError('Connection closed by server')
+            if opcode == OPCODE_PING:
+                self.writer.write(encode_frame(payload, OPCODE_PONG, mask=True))
+                continue
+            if opcode != OPCODE_TEXT:
+                continue
+
+            sent = json.loads(payload).get('content', {}).get('sent')
+            if sent is not None:
+                self.latencies.append(time.time() - sent)
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except ConnectionError:
+                pass
+
+
+async def run(args) -> dict:
+    limit = raise_nofile_limit()
+    if limit < args.connections + 64:
+        print(f'Warning: RLIMIT_NOFILE is {limit}, which is too low for {args.connections} connections', file=sys.stderr)
+
+    server = None
+    if args.standin:
+        standin = StandInServer(args.interval)
+        server = await standin.serve('127.0.0.1', urlsplit(args.url).port or 80)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    clients = [Client(args.url) for _ in range(args.connections)]
+    connect_times = []
+    errors: dict[str, int] = {}
+
+    async def connect(client: Client) -> bool:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await asyncio.wait_for(client.connect(), args.timeout)
+            except Exception as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                return False
+            connect_times.append(time.perf_counter() - start)
+            return True
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(connect(client) for client in clients))
+    ramp_up = time.perf_counter() - start
+    connected = [client for client, ok in zip(clients, results) if ok]
+
+    print(f'{len(connected)}/{args.connections} connections established in {ramp_up:.2f}s')
+
+    receive_errors = 0
+    if connected:
+        outcomes = await asyncio.gather(
+            *(asyncio.wait_for(client.receive(args.messages), args.messages * args.interval + args.timeout) for client in connected),
+            return_exceptions=True,
+        )
+        receive_errors = sum(1 for outcome in outcomes if isinstance(outcome, Exception))
+
+    await asyncio.gather(*(client.close() for client in clients))
+    if server is not None:
+        server.close()
+        # Let the stand-in's handlers notice the closed connections before the loop stops
+        await asyncio.sleep(0.5)
+
+    fanout = [latency for client in connected for latency in client.latencies]
+
+    report = {
+        'benchmark': 'notification_load',
+        'url': args.url,
+        'connections': args.connections,
+        'connected': len(connected),
+        'connect_errors': errors,
+        'receive_errors': receive_errors,
+        'ramp_up_seconds': round(ramp_up, 3),
+        'connect_latency': summarize(connect_times),
+        'fanout_latency': summarize(fanout),
+    }
+
+    print_summary('Connect latency', report['connect_latency'])
+    print_summary('Fan-out latency', report['fanout_latency'])
+
+    return report
+
+
+async def serve(args):
+    raise_nofile_limit()
+    standin = StandInServer(args.interval)
+    server = await standin.serve(args.host, args.port)
+    print(f'Stand-in notification server listening on {args.host}:{args.port}')
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Run the stand-in notification server')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8083)
+    serve_parser.add_argument('--interval', type=float, default=1.0, help='Seconds between broadcast events')
+
+    run_parser = subparsers.add_parser('run', help='Run the load generator')
+    run_parser.add_argument('--url', default='ws://127.0.0.1:8083/')
+    run_parser.add_argument('--connections', type=int, default=1000)
+    run_parser.add_argument('--concurrency', type=int, default=200, help='Maximum number of simultaneous handshakes')
+    run_parser.add_argument('--messages', type=int, default=5, help='Number of broadcast events to wait for')
+    run_parser.add_argument('--interval', type=float, default=1.0, help='Seconds between broadcast events (stand-in only)')
+    run_parser.add_argument('--timeout', type=float, default=30.0)
+    run_parser.add_argument('--standin', action='store_true', help='Start the stand-in server inside this process')
+    run_parser.add_argument('--report', help='Write a JSON report to this file')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report = asyncio.run(run(args))
+    if args.report:
+        write_report(args.report, report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+
+"""
+Measures PUT/GET throughput of seafdav (WebDAV).
+
+Every worker uploads files of the given size, then all files are downloaded again.
+Run against the bundled stand-in server (which discards uploads and returns zeros on download):
+
+    ./seafdav_throughput.py serve --port 8080
+    ./seafdav_throughput.py run --url http://127.0.0.1:8080/seafdav/
+
+Or against a real deployment through NGINX:
+
+    ./seafdav_throughput.py run --url "http://127.0.0.1/seafdav/My Library/" --user me@example.com --password secret
+"""
+
+import argparse
+import base64
+import http.client
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, urlsplit
+
+from benchlib import parse_size, payload_chunks, print_summary, run_concurrently, summarize, throughput, write_report
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """
+    Accepts PUT/GET/DELETE on any path. Only the size of uploaded files is stored.
+    The number of requests processed in parallel is limited like seafdav's gunicorn workers.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    sizes: dict[str, int] = {}
+    workers: threading.Semaphore = threading.Semaphore(5)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_PUT(self):
+        with self.workers:
+            remaining = int(self.headers.get('Content-Length', 0))
+            received = 0
+            while remaining > 0:
+                data = self.rfile.read(min(CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                received += len(data)
+                remaining -= len(data)
+
+            self.sizes[self.path] = received
+            self.send_response(201)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+
+    def do_GET(self):
+        with self.workers:
+            size = self.sizes.get(self.path)
+            if size is None:
+                self.send_response(404)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(size))
+            self.end_headers()
+            for chunk in payload_chunks(size, CHUNK_SIZE):
+                self.wfile.write(chunk)
+
+    def do_DELETE(self):
+        self.sizes.pop(self.path, None)
+        self.send_response(204)
+        self.end_headers()
+
+
+class Target:
+    def __init__(self, url: str, user: str, password: str, timeout: float):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = quote(parts.path if parts.path.endswith('/') else parts.path + '/')
+        self.timeout = timeout
+        self.headers = {}
+        if user:
+            credentials = base64.b64encode(f'{user}:{password}'.encode()).decode()
+            self.headers['Authorization'] = f'Basic {credentials}'
+
+    def connect(self) -> http.client.HTTPConnection:
+        if self.scheme == 'https':
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+
+def put(target: Target, name: str, size: int) -> float:
+    connection = target.connect()
+    start = time.perf_counter()
+    headers = dict(target.headers, **{'Content-Length': str(size), 'Content-Type': 'application/octet-stream'})
+    connection.request('PUT', target.path + name, body=payload_chunks(size, CHUNK_SIZE), headers=headers)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    if response.status not in (200, 201, 204):
+        raise RuntimeError(f'PUT {name} failed with status {response.status}')
+    return time.perf_counter() - start
+
+
+def get(target: Target, name: str) -> tuple[float, int]:
+    connection = target.connect()
+    start = time.perf_counter()
+    connection.request('GET', target.path + name, headers=target.headers)
+    response = connection.getresponse()
+    received = 0
+    while True:
+        data = response.read(CHUNK_SIZE)
+        if not data:
+            break
+        received += len(data)
+    connection.close()
+    if response.status != 200:
+        raise RuntimeError(f'GET {name} failed with status {response.status}')
+    return time.perf_counter() - start, received
+
+
+def delete(target: Target, name: str):
+    connection = target.connect()
+    connection.request('DELETE', target.path + name, headers=target.headers)
+    connection.getresponse().read()
+    connection.close()
+
+
+def run(args) -> dict:
+    size = parse_size(args.size)
+    target = Target(args.url, args.user, args.password, args.timeout)
+    names = [f'seafdav-benchmark-{i}.bin' for i in range(args.files)]
+
+    server = None
+    if args.standin:
+        StandInHandler.workers = threading.Semaphore(args.standin_workers)
+        server = ThreadingHTTPServer(('127.0.0.1', urlsplit(args.url).port or 80), StandInHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    put_latencies, put_seconds, put_errors = run_concurrently('PUT', put, [(target, name, size) for name in names], args.concurrency)
+    get_results, get_seconds, get_errors = run_concurrently('GET', get, [(target, name) for name in names], args.concurrency)
+
+    if not args.keep:
+        run_concurrently('DELETE', delete, [(target, name) for name in names], args.concurrency)
+
+    if server is not None:
+        server.shutdown()
+
+    report = {
+        'benchmark': 'seafdav_throughput',
+        'url': args.url,
+        'files': args.files,
+        'file_size': size,
+        'concurrency': args.concurrency,
+        'put': {
+            'errors': put_errors,
+            'seconds': round(put_seconds, 3),
+            'throughput_mib_s': throughput(size * len(put_latencies), put_seconds),
+            'latency': summarize(put_latencies),
+        },
+        'get': {
+            'errors': get_errors,
+            'seconds': round(get_seconds, 3),
+            'throughput_mib_s': throughput(sum(received for _, received in get_results), get_seconds),
+            'latency': summarize([latency for latency, _ in get_results]),
+        },
+    }
+
+    for method in ('put', 'get'):
+        print(f'{method.upper()}: {report[method]["throughput_mib_s"]} MiB/s ({report[method]["errors"]} errors)')
+        print_summary(f'{method.upper()} latency', report[method]['latency'])
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Run the stand-in WebDAV server')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=8080)
+    serve_parser.add_argument('--workers', type=int, default=5, help='Number of requests processed in parallel')
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmark')
+    run_parser.add_argument('--url', default='http://127.0.0.1:8080/seafdav/', help='WebDAV folder that files are uploaded to')
+    run_parser.add_argument('--user', default='')
+    run_parser.add_argument('--password', default='')
+    run_parser.add_argument('--files', type=int, default=20)
+    run_parser.add_argument('--size', default='100m', help='Size of every file (e.g. 512k, 100m, 2g)')
+    run_parser.add_argument('--concurrency', type=int, default=5)
+    run_parser.add_argument('--timeout', type=float, default=1200.0)
+    run_parser.add_argument('--keep', action='store_true', help='Do not delete the uploaded files')
+    run_parser.add_argument('--standin', action='store_true', help='Start the stand-in server inside this process')
+    run_parser.add_argument('--standin-workers', type=int, default=5)
+    run_parser.add_argument('--report', help='Write a JSON report to this file')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        StandInHandler.workers = threading.Semaphore(args.workers)
+        server = ThreadingHTTPServer((args.host, args.port), StandInHandler)
+        print(f'Stand-in WebDAV server listening on {args.host}:{args.port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report = run(args)
+    if args.report:
+        write_report(args.report, report)
+
+
+if __name__ == '__main__':
+    main()
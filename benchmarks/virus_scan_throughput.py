@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+
+"""
+Measures virus scan throughput of the scan command used by seafevents (docker/scripts/clamd-scan.py).
+
+Creates a set of files and scans them with multiple threads, like seafevents' virus scanner does
+(one scan command invocation per file). The stand-in clamd server implements the INSTREAM command
+and simulates the scan cost with a configurable scan rate; files containing the EICAR test string
+are reported as infected.
+
+    ./virus_scan_throughput.py serve --port 3310
+    ./virus_scan_throughput.py run --files 500 --size 512k --threads 4
+
+Use --in-process to measure the scan without the cost of starting one process per file.
+Use --host/--port to run against a real clamd (e.g. the seafile-clamav container).
+"""
+
+import argparse
+import importlib.util
+import os
+import socketserver
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from benchlib import parse_size, print_summary, run_concurrently, summarize, throughput, write_report
+
+SCAN_COMMAND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'docker', 'scripts', 'clamd-scan.py')
+
+EICAR = rb'X5O!P%@AP[4\PZX54(P^)7CC)7}$EICAR-STANDARD-ANTIVIRUS-TEST-FILE!$H+H*'
+
+
+class StandInHandler(socketserver.BaseRequestHandler):
+    """
+    Speaks the parts of the clamd protocol used by the scan command (PING and INSTREAM)
+    """
+
+    scan_rate = 50 * 1024 ** 2
+    stream_max_length = 25 * 1024 ** 2
+
+    def read_exactly(self, length: int) -> bytes:
+        data = b''
+        while len(data) < length:
+            chunk = self.request.recv(length - len(data))
+            if not chunk:
+                raise ConnectionError('Connection closed')
+            data += chunk
+        return data
+
+    def handle(self):
+        command = b''
+        while not command.endswith((b'\0', b'\n')):
+            data = self.request.recv(1)
+            if not data:
+                return
+            command += data
+
+        command = command.rstrip(b'\0\n').lstrip(b'zn')
+        if command == b'PING':
+            self.request.sendall(b'PONG\0')
+            return
+        if command != b'INSTREAM':
+            self.request.sendall(b'UNKNOWN COMMAND\0')
+            return
+
+        size = 0
+        infected = False
+        tail = b''
+        while True:
+            length = struct.unpack('!L', self.read_exactly(4))[0]
+            if length == 0:
+                break
+            chunk = self.read_exactly(length)
+            size += length
+            if size > self.stream_max_length:
+                self.request.sendall(b'INSTREAM size limit exceeded. ERROR\0')
+                return
+            # Keep the end of the previous chunk since the signature might span two chunks
+            infected = infected or EICAR in tail + chunk
+            tail = chunk[-len(EICAR):]
+
+        time.sleep(size / self.scan_rate)
+
+        if infected:
+            self.request.sendall(b'stream: Eicar-Signature FOUND\0')
+        else:
+            self.request.sendall(b'stream: OK\0')
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def load_scan_module():
+    spec = importlib.util.spec_from_file_location('clamd_scan', SCAN_COMMAND)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def create_files(directory: str, count: int, size: int, infected: int) -> list[str]:
+    paths = []
+    for i in range(count):
+        path = os.path.join(directory, f'file-{i}.bin')
+        with open(path, 'wb') as file:
+            if i < infected:
+                file.write(EICAR)
+                file.write(os.urandom(max(0, size - len(EICAR))))
+            else:
+                file.write(os.urandom(size))
+        paths.append(path)
+    return paths
+
+
+def scan_with_process(path: str, env: dict) -> tuple[float, int]:
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, SCAN_COMMAND, path], env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start, result.returncode
+
+
+def scan_in_process(path: str, module, host: str, port: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    reply = module.scan_file(path, host=host, port=port)
+    exit_code = module.EXIT_VIRUS if reply.endswith('FOUND') else module.EXIT_CLEAN if reply.endswith('OK') else module.EXIT_ERROR
+    return time.perf_counter() - start, exit_code
+
+
+def run(args) -> dict:
+    size = parse_size(args.size)
+
+    server = None
+    if args.standin:
+        StandInHandler.scan_rate = parse_size(args.scan_rate)
+        server = StandInServer((args.host, args.port), StandInHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = create_files(directory, args.files, size, args.infected)
+
+        if args.in_process:
+            module = load_scan_module()
+            jobs = [(path, module, args.host, args.port) for path in paths]
+            results, seconds, errors = run_concurrently('Scan', scan_in_process, jobs, args.threads)
+        else:
+            env = dict(os.environ, CLAMD_HOST=args.host, CLAMD_PORT=str(args.port))
+            results, seconds, errors = run_concurrently('Scan', scan_with_process, [(path, env) for path in paths], args.threads)
+
+    if server is not None:
+        server.shutdown()
+
+    exit_codes = [exit_code for _, exit_code in results]
+
+    report = {
+        'benchmark': 'virus_scan_throughput',
+        'mode': 'in-process' if args.in_process else 'process-per-file',
+        'files': args.files,
+        'file_size': size,
+        'threads': args.threads,
+        'errors': errors + exit_codes.count(2),
+        'infected_found': exit_codes.count(1),
+        'infected_expected': args.infected,
+        'seconds': round(seconds, 3),
+        'files_per_second': round(len(results) / seconds, 2) if seconds > 0 else 0.0,
+        'throughput_mib_s': throughput(size * len(results), seconds),
+        'latency': summarize([latency for latency, _ in results]),
+    }
+
+    print(f'{report["files_per_second"]} files/s, {report["throughput_mib_s"]} MiB/s ({report["errors"]} errors, {report["infected_found"]}/{args.infected} infected files found)')
+    print_summary('Scan latency', report['latency'])
+
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help='Run the stand-in clamd server')
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=3310)
+    serve_parser.add_argument('--scan-rate', default='50m', help='Simulated scan rate per second (e.g. 50m)')
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmark')
+    run_parser.add_argument('--host', default='127.0.0.1', help='clamd host')
+    run_parser.add_argument('--port', type=int, default=3310, help='clamd port')
+    run_parser.add_argument('--files', type=int, default=200)
+    run_parser.add_argument('--size', default='512k', help='Size of every file (e.g. 512k, 10m)')
+    run_parser.add_argument('--infected', type=int, default=1, help='Number of files containing the EICAR test string')
+    run_parser.add_argument('--threads', type=int, default=4, help='Matches "threads" in the [virus_scan] section')
+    run_parser.add_argument('--in-process', action='store_true', help='Scan without starting a process per file')
+    run_parser.add_argument('--standin', action='store_true', help='Start the stand-in server inside this process')
+    run_parser.add_argument('--scan-rate', default='50m', help='Simulated scan rate of the stand-in server')
+    run_parser.add_argument('--report', help='Write a JSON report to this file')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        StandInHandler.scan_rate = parse_size(args.scan_rate)
+        server = StandInServer((args.host, args.port), StandInHandler)
+        print(f'Stand-in clamd listening on {args.host}:{args.port}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    report = run(args)
+    if args.report:
+        write_report(args.report, report)
+
+
+if __name__ == '__main__':
+    main()
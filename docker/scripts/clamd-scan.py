@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""
+Scans files by streaming them to clamd over TCP (INSTREAM command).
+Used as scan_command for seafevents' virus scanner instead of clamscan,
+which has to load the whole signature database for every single file.
+
+Exit codes (match virus_code/nonvirus_code inside seafile.conf):
+  0: no virus found
+  1: virus found
+  2: error
+"""
+
+import os
+import socket
+import struct
+import sys
+
+CLAMD_HOST = os.environ.get('CLAMD_HOST', 'av')
+CLAMD_PORT = int(os.environ.get('CLAMD_PORT', '3310'))
+CLAMD_TIMEOUT = float(os.environ.get('CLAMD_TIMEOUT', '300'))
+
+CHUNK_SIZE = 256 * 1024
+
+EXIT_CLEAN = 0
+EXIT_VIRUS = 1
+EXIT_ERROR = 2
+
+def scan_file(path: str, host: str = CLAMD_HOST, port: int = CLAMD_PORT, timeout: float = CLAMD_TIMEOUT) -> str:
+    # Returns clamd's reply, e.g. "stream: OK" or "stream: Eicar-Signature FOUND"
+    with socket.create_connection((host, port), timeout=timeout) as connection, open(path, 'rb') as file:
+        connection.sendall(b'zINSTREAM\0')
+
+        while True:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            connection.sendall(struct.pack('!L', len(chunk)) + chunk)
+
+        connection.sendall(struct.pack('!L', 0))
+
+        reply = b''
+        while not reply.endswith(b'\0'):
+            data = connection.recv(4096)
+            if not data:
+                break
+            reply += data
+
+    return reply.rstrip(b'\0').decode('utf-8', errors='replace').strip()
+
+def main(paths: list[str]) -> int:
+    if not paths:
+        print(f'Usage: {os.path.basename(sys.argv[0])} FILE...', file=sys.stderr)
+        return EXIT_ERROR
+
+    exit_code = EXIT_CLEAN
+
+    for path in paths:
+        try:
+            reply = scan_file(path)
+        except OSError as e:
+            print(f'{path}: {e}', file=sys.stderr)
+            return EXIT_ERROR
+
+        print(f'{path}: {reply}')
+
+        if reply.endswith('FOUND'):
+            exit_code = EXIT_VIRUS
+        elif not reply.endswith('OK'):
+            # e.g. "INSTREAM size limit exceeded. ERROR"
+            return EXIT_ERROR
+
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+
+"""
+Runs django-compressor's offline compression for seahub once per seafile version.
+The output (including manifest.json) is stored in /shared so that it survives
+container restarts and is shared by all gunicorn workers.
+"""
+
+import json
+import logging
+import os
+import fcntl
+import re
+import shutil
+import sys
+import time
+
+from os.path import exists, isdir, islink, join
+from offline_compression import get_offline_context
+from utils import call, get_install_dir, get_script
+
+logger = logging.getLogger('compress-static')
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+INSTALL_DIR = get_install_dir()
+
+# Default values of COMPRESS_ROOT/COMPRESS_OUTPUT_DIR in seahub/settings.py
+COMPRESS_OUTPUT_DIR = join(INSTALL_DIR, 'seahub/media/CACHE')
+SHARED_COMPRESS_DIR = '/shared/seafile/seahub-data/compress'
+# Context that the files have been compressed with (COMPRESS_OFFLINE_CONTEXT); written after a successful compression
+CONTEXT_FILE_NAME = 'context.json'
+# Serializes the compression between cluster nodes sharing /shared
+LOCK_FILE_NAME = '.lock'
+
+# The output of older versions is removed once the current version has been compressed for this long (in seconds),
+# since other cluster nodes may still be serving it during a rolling upgrade
+STALE_OUTPUT_GRACE = 7 * 86400
+
+def read_context(output_dir: str) -> dict[str, str] | None:
+    try:
+        with open(join(output_dir, CONTEXT_FILE_NAME), 'r') as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+def link_output_dir(output_dir: str):
+    if not exists(output_dir):
+        os.makedirs(output_dir)
+
+    if islink(COMPRESS_OUTPUT_DIR):
+        os.unlink(COMPRESS_OUTPUT_DIR)
+    elif exists(COMPRESS_OUTPUT_DIR):
+        shutil.rmtree(COMPRESS_OUTPUT_DIR)
+
+    os.symlink(output_dir, COMPRESS_OUTPUT_DIR)
+
+def parse_version(version: str) -> tuple[int, ...]:
+    return tuple(int(part) for part in re.findall(r'\d+', version))
+
+def remove_stale_output_dirs(version: str, output_dir: str):
+    try:
+        compressed_at = os.path.getmtime(join(output_dir, CONTEXT_FILE_NAME))
+    except OSError:
+        return
+
+    if time.time() - compressed_at < STALE_OUTPUT_GRACE:
+        return
+
+    for entry in os.listdir(SHARED_COMPRESS_DIR):
+        # Newer versions are used by nodes that have already been upgraded
+        if not isdir(join(SHARED_COMPRESS_DIR, entry)) or parse_version(entry) >= parse_version(version):
+            continue
+        logger.info('Removing compressed files of version %s', entry)
+        shutil.rmtree(join(SHARED_COMPRESS_DIR, entry), ignore_errors=True)
+
+def compress(output_dir: str):
+    # --force is required since "manage.py compress" refuses to run if COMPRESS_OFFLINE is not set in seahub's settings
+    command = '{} python-env python3 seahub/manage.py compress --force'.format(get_script('seahub.sh'))
+
+    if os.getenv('NON_ROOT', default='') == 'true':
+        call('chown -R seafile:seafile {}'.format(output_dir))
+        command = 'su seafile -c "{}"'.format(command)
+
+    try:
+        call(command, cwd=INSTALL_DIR)
+    except Exception as e:
+        logger.error('Offline compression of static files failed: %s', e)
+        sys.exit(1)
+
+if __name__ == '__main__':
+    if os.environ.get('SEAHUB__COMPRESS_OFFLINE', 'false').lower() != 'true':
+        sys.exit(0)
+
+    version = os.environ['SEAFILE_VERSION']
+    output_dir = join(SHARED_COMPRESS_DIR, version)
+
+    link_output_dir(output_dir)
+
+    with open(join(SHARED_COMPRESS_DIR, LOCK_FILE_NAME), 'w') as lock:
+        # Other nodes starting at the same time wait here and find the manifest afterwards
+        fcntl.flock(lock, fcntl.LOCK_EX)
+
+        # manage.py compress writes the manifest after all files have been compressed
+        # The manifest is keyed by the rendered templates, so it has to be regenerated if SITE_ROOT/MEDIA_URL/STATIC_URL change
+        context = get_offline_context()
+        if exists(join(output_dir, 'manifest.json')) and read_context(output_dir) == context:
+            logger.info('Static files have already been compressed for version %s', version)
+        else:
+            if exists(join(output_dir, 'manifest.json')):
+                logger.info('SITE_ROOT, MEDIA_URL or STATIC_URL has changed since the static files have been compressed')
+                os.unlink(join(output_dir, 'manifest.json'))
+
+            logger.info('Compressing static files for version %s...', version)
+            compress(output_dir)
+
+            with open(join(output_dir, CONTEXT_FILE_NAME), 'w') as file:
+                json.dump(context, file)
+            logger.info('Successfully compressed static files')
+
+        remove_stale_output_dirs(version, output_dir)
@@ -22,6 +22,19 @@ while [ 1 ]; do
     fi
 done
 
+# NGINX requires two file descriptors per websocket connection of the notification server (client and upstream)
+required_nofile="${NGINX_WORKER_RLIMIT_NOFILE:-8192}"
+hard_nofile=$(ulimit -Hn)
+if [[ "$hard_nofile" != "unlimited" && "$hard_nofile" -lt "$required_nofile" ]]; then
+    log "Warning: The hard limit for open files (${hard_nofile}) is lower than NGINX_WORKER_RLIMIT_NOFILE (${required_nofile}). Use the ulimits setting in your compose file to raise it."
+fi
+
+# Raise the soft limit for all processes started by this script (as far as the hard limit allows)
+soft_nofile=$(ulimit -Sn)
+if [[ "$soft_nofile" != "unlimited" && "$soft_nofile" -lt "$required_nofile" ]]; then
+    ulimit -Sn "$required_nofile" 2>/dev/null || ulimit -Sn "$hard_nofile"
+fi
+
 if [[ "${SEAFILE_LOG_TO_STDOUT:-false}" == "true" ]]; then
     log "Creating symbolic links inside /opt/seafile/logs..."
 
@@ -76,12 +89,40 @@ if [[ $NON_ROOT == "true" ]] ;then
     sed -i 's/^    validate_running_user;/#    validate_running_user;/' /opt/seafile/$SEAFILE_SERVER-$SEAFILE_VERSION/seafile.sh
 fi
 
-if [[ "${SEAFILE_LOG_TO_STDOUT:-false}" == "false" ]]; then
+# Logs are rotated by start.py (or log_rotation.py in cluster setups) unless SEAFILE_LOG_ROTATION=logrotate
+if [[ "${SEAFILE_LOG_TO_STDOUT:-false}" == "false" && "${SEAFILE_LOG_ROTATION:-internal}" == "logrotate" ]]; then
     # logrotate
     cat /scripts/logrotate-conf/logrotate-cron >> /var/spool/cron/crontabs/root
     /usr/bin/crontab /var/spool/cron/crontabs/root
 fi
 
+# Retention of the seafevents tables (only on the node that initializes the database)
+# Remove the entry of a previous container start (also if the retention has been disabled since)
+if [[ -f /var/spool/cron/crontabs/root ]] && grep -q 'seafevents-retention.py' /var/spool/cron/crontabs/root; then
+    sed -i '/seafevents-retention.py/d' /var/spool/cron/crontabs/root
+    /usr/bin/crontab /var/spool/cron/crontabs/root
+fi
+if [[ -n "${SEAFEVENTS_RETENTION_DAYS}" && ! ( "${CLUSTER_SERVER:-false}" == "true" && "${CLUSTER_MODE}" == "frontend" ) ]]; then
+    if [[ "${SEAFILE_LOG_TO_STDOUT:-false}" == "true" ]]; then
+        retention_log="/proc/1/fd/1"
+    else
+        retention_log="/opt/seafile/logs/seafevents-retention.log"
+    fi
+
+    # cron does not pass the container's environment variables, so the settings are part of the command
+    retention_command="/scripts/seafevents-retention.py prune --days ${SEAFEVENTS_RETENTION_DAYS}"
+    if [[ -n "${SEAFEVENTS_RETENTION_KEEP}" ]]; then
+        retention_command="${retention_command} --keep ${SEAFEVENTS_RETENTION_KEEP}"
+    fi
+    if [[ -n "${SEAFEVENTS_RETENTION_ARCHIVE_DATABASE}" ]]; then
+        retention_command="${retention_command} --archive-database ${SEAFEVENTS_RETENTION_ARCHIVE_DATABASE}"
+    fi
+
+    log "Scheduling retention of seafevents tables (${SEAFEVENTS_RETENTION_DAYS} days)..."
+    echo "${SEAFEVENTS_RETENTION_SCHEDULE:-30 3 * * *} ${retention_command} >> ${retention_log} 2>&1" >> /var/spool/cron/crontabs/root
+    /usr/bin/crontab /var/spool/cron/crontabs/root
+fi
+
 log "Generating configuration files based on environment variables..."
 /scripts/generate-config-files.py
 
@@ -144,6 +185,11 @@ if [ ! -d "$dst_custom_dir" ]; then
     ln -sf "$dst_custom_dir" "$custom_dir"
 fi
 
+if [[ "${SEAHUB__COMPRESS_OFFLINE:-false}" == "true" ]]; then
+    log "Checking offline compression of static files..."
+    /scripts/compress-static.py
+fi
+
 # remove license file symlink if file is empty
 if [ $(wc -c < /opt/seafile/seafile-license.txt) -lt 5 ]; then
     log "license file seems to be empty and was therefore removed. Up to three users are possible."
@@ -153,6 +199,8 @@ fi
 # start cluster server
 if [[ $CLUSTER_SERVER == "true" && $SEAFILE_SERVER == "seafile-pro-server" ]] ;then
     # TODO: Check this code path
+    # cluster_server.sh does not use start.py, so the logs are rotated by a separate process
+    /scripts/log_rotation.py &
     /scripts/cluster_server.sh enterpoint &
 
 # start server
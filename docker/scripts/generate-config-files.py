@@ -4,9 +4,11 @@ import configparser
 import json
 import logging
 import os
+import re
 import sys
 
 from bootstrap import get_proto
+from offline_compression import get_offline_context
 
 logger = logging.getLogger('generate-config-files')
 logger.setLevel(logging.DEBUG)
@@ -22,6 +24,11 @@ SEAHUB_SETTINGS_PATH = os.path.join(CONFIG_DIR, 'seahub_settings.py')
 SEAHUB_SETTINGS_OVERRIDES_CONF_PATH = '/tmp/seahub_settings_overrides.py'
 SEAFILE_ROLES_PATH = '/tmp/seafile_roles.json'
 NGINX_CONF_PATH = '/shared/nginx/conf/seafile.nginx.conf'
+NGINX_MAIN_CONF_PATH = '/etc/nginx/nginx.conf'
+NGINX_CACHE_DIR = '/var/cache/nginx/seafile'
+
+# Number of seahub worker processes
+GUNICORN_WORKERS = 5
 
 CONFIG_FILE_WARNING = '# WARNING: This file will be regenerated on container startup. Any manual changes will be overwritten.\n\n'
 
@@ -49,6 +56,9 @@ DEFAULT_VALUES = {
     'SEAFDAV__WEBDAV__enabled': 'false',
     'SEAFDAV__WEBDAV__port': '8080',
     'SEAFDAV__WEBDAV__share_name': '/seafdav',
+    # Number of gunicorn workers and their timeout (in seconds) used by seafile-controller to start seafdav
+    'SEAFDAV__WEBDAV__workers': '5',
+    'SEAFDAV__WEBDAV__timeout': '1200',
 
     'SEAFEVENTS__DATABASE__type': 'mysql',
     'SEAFEVENTS__DATABASE__host': os.environ.get('DB_HOST'),
@@ -75,6 +85,10 @@ DEFAULT_VALUES = {
 
     'SEAFILE__fileserver__port': '8082',
     'SEAFILE__fileserver__use_go_fileserver': 'true',
+    # Default values of the Go fileserver
+    'SEAFILE__fileserver__worker_threads': '10',
+    'SEAFILE__fileserver__max_indexing_threads': '1',
+    'SEAFILE__fileserver__max_index_processing_threads': '3',
     'SEAFILE__database__type': 'mysql',
     'SEAFILE__database__host': os.environ.get('DB_HOST'),
     'SEAFILE__database__port': '3306',
@@ -95,6 +109,83 @@ DEFAULT_VALUES = {
     'SEAHUB__AVATAR_FILE_STORAGE': 'seahub.base.database_storage.DatabaseStorage',
 }
 
+# Default values that are used if VIRUS_SCAN_ENABLED is set to true
+# Files are streamed to clamd (see clamav.yml) instead of spawning clamscan, which loads all signatures for every file
+VIRUS_SCAN_DEFAULT_VALUES = {
+    'SEAFILE__virus_scan__scan_command': '/scripts/clamd-scan.py',
+    'SEAFILE__virus_scan__virus_code': '1',
+    'SEAFILE__virus_scan__nonvirus_code': '0',
+    # Minutes between scans
+    'SEAFILE__virus_scan__scan_interval': '5',
+    # Files larger than this (in MB) are not scanned; must not exceed clamd's StreamMaxLength (25 MB by default)
+    'SEAFILE__virus_scan__scan_size_limit': '20',
+    'SEAFILE__virus_scan__scan_skip_ext': '.bmp,.gif,.ico,.png,.jpg,.jpeg,.webp,.mp3,.mp4,.wav,.avi,.mkv,.mov,.rmvb',
+    'SEAFILE__virus_scan__threads': '4',
+}
+
+# Default values for settings that only affect seafile.nginx.conf
+NGINX_DEFAULT_VALUES = {
+    # Avatars are stored inside the database (see SEAHUB__AVATAR_FILE_STORAGE)
+    'NGINX_AVATAR_CACHE_ENABLED': 'true',
+    'NGINX_AVATAR_CACHE_MAX_SIZE': '256m',
+    'NGINX_AVATAR_CACHE_VALID': '10m',
+
+    # Static files of the OnlyOffice document server (JS, fonts, ...) are identical for every editor session
+    'NGINX_ONLYOFFICE_CACHE_ENABLED': 'true',
+    'NGINX_ONLYOFFICE_CACHE_MAX_SIZE': '1g',
+    'NGINX_ONLYOFFICE_CACHE_VALID': '1d',
+    # Opt-in: the upstream group is resolved once at startup (restart required after the document server container has been recreated)
+    'NGINX_ONLYOFFICE_UPSTREAM_ENABLED': 'false',
+    'NGINX_ONLYOFFICE_KEEPALIVE': '16',
+
+    # Every websocket connection of the notification server requires two connections/file descriptors (client and upstream)
+    'NGINX_WORKER_CONNECTIONS': '4096',
+    'NGINX_WORKER_RLIMIT_NOFILE': '8192',
+    'NGINX_NOTIFICATION_TIMEOUT': '3600s',
+
+    'NGINX_SEAFHTTP_KEEPALIVE': '32',
+    'NGINX_SEAFHTTP_TIMEOUT': '36000s',
+    'NGINX_SEAFHTTP_BUFFERING': 'on',
+    'NGINX_SEAFHTTP_BUFFER_SIZE': '64k',
+    'NGINX_SEAFHTTP_BUFFERS': '8 64k',
+    'NGINX_SEAFHTTP_MAX_TEMP_FILE_SIZE': '1024m',
+
+    'NGINX_SEAFDAV_KEEPALIVE': '16',
+    # Limits how much of a download is buffered to disk by NGINX (0 disables buffering to disk)
+    'NGINX_SEAFDAV_MAX_TEMP_FILE_SIZE': '1024m',
+
+    # Request rate (with burst) and number of requests in flight per client address
+    'NGINX_RATE_LIMIT_ENABLED': 'false',
+    'NGINX_RATE_LIMIT_API': '10r/s',
+    'NGINX_RATE_LIMIT_API_BURST': '50',
+    'NGINX_CONN_LIMIT_API': '10',
+    'NGINX_RATE_LIMIT_SEAFHTTP': '50r/s',
+    'NGINX_RATE_LIMIT_SEAFHTTP_BURST': '200',
+    'NGINX_CONN_LIMIT_SEAFHTTP': '20',
+    'NGINX_RATE_LIMIT_SEAFDAV': '20r/s',
+    'NGINX_RATE_LIMIT_SEAFDAV_BURST': '50',
+    'NGINX_CONN_LIMIT_SEAFDAV': '10',
+    'NGINX_RATE_LIMIT_NOTIFICATION': '1r/s',
+    'NGINX_RATE_LIMIT_NOTIFICATION_BURST': '10',
+    'NGINX_CONN_LIMIT_NOTIFICATION': '10',
+    # Client addresses are taken from X-Forwarded-For if a request comes from one of these networks (Docker networks by default)
+    'NGINX_TRUSTED_PROXIES': '172.16.0.0/12,192.168.0.0/16,10.0.0.0/8',
+}
+
+# Default throttle rates of seahub (seahub/settings.py), REST_FRAMEWORK replaces the whole dictionary
+SEAHUB_THROTTLE_RATES = {
+    'ping': '3000/minute',
+    'anon': '60/minute',
+    'user': '3000/minute',
+}
+
+def get_nginx_setting(key: str) -> str:
+    return os.environ.get(key, NGINX_DEFAULT_VALUES[key])
+
+# Returns the value of a configuration file setting (e.g. "SEAFDAV__WEBDAV__port"), values supplied by the user take precedence
+def get_conf_value(key: str) -> str:
+    return os.environ.get(key, DEFAULT_VALUES.get(key))
+
 # Generates a config file
 # path is the file location
 # prefix is the prefix for environment variables
@@ -147,7 +238,7 @@ def generate_gunicorn_config_file(path: str):
 import os
 
 daemon = %(daemon)s
-workers = 5
+workers = %(workers)s
 
 # default localhost:8000
 bind = "127.0.0.1:8000"
@@ -165,6 +256,7 @@ limit_request_line = 8190
     config = {
         # daemon mode must be turned off if logs should go to stdout
         'daemon': os.environ.get('SEAFILE_LOG_TO_STDOUT', 'false').lower() == 'false',
+        'workers': GUNICORN_WORKERS,
     }
 
     if not os.path.exists(path):
@@ -205,7 +297,7 @@ DATABASES = {
 CACHES = {
     'default': {
         'BACKEND': '%(backend)s',
-        'LOCATION': '%(host)s:%(port)s',
+        'LOCATION': %(location)s,
     },
     'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
@@ -217,22 +309,32 @@ CACHES = {
     cache_backend = os.environ.get('SEAHUB__CACHE_BACKEND', 'memcached')
     if cache_backend == 'memcached':
         django_cache_backend = 'django_pylibmc.memcached.PyLibMCCache'
-        cache_host = os.environ.get('SEAHUB__CACHE_HOST', 'memcached')
+        cache_locations = get_cache_servers(default_host='memcached')
     elif cache_backend == 'redis':
         # TODO: The redis python package is missing from the container image, therefore the redis cache backend does not work!
         django_cache_backend = 'django.core.cache.backends.redis.RedisCache'
         # The redis:// protocol prefix is required
-        cache_host = f'redis://{os.environ.get("SEAHUB__CACHE_HOST", "redis")}'
+        cache_locations = [f'redis://{server}' for server in get_cache_servers(default_host='redis')]
     else:
         logger.error('Error: Invalid value for variable "SEAHUB_CACHE_BACKEND": "%s" (must be "memcached" or "redis")', cache_backend)
         sys.exit(1)
 
     cache_config = {
         'backend': django_cache_backend,
-        'host': cache_host,
-        'port': os.environ.get('SEAHUB__CACHE_PORT', '11211'),
+        # Multiple servers must be passed as a list
+        'location': repr(cache_locations[0] if len(cache_locations) == 1 else cache_locations),
     }
 
+    # The offline manifest is keyed by the rendered content of each {% compress %} block,
+    # so the context used by "manage.py compress" must match the one used at runtime
+    compress_offline_template = """
+COMPRESS_OFFLINE_CONTEXT = {
+    'MEDIA_URL': %(MEDIA_URL)r,
+    'STATIC_URL': %(STATIC_URL)r,
+    'SITE_ROOT': %(SITE_ROOT)r,
+}
+"""
+
     logging_template = """
 import sys
 
@@ -335,8 +437,6 @@ LOGGING = {
         # Exclude variables that are lists (for now)
         'SEAHUB__CSRF_TRUSTED_ORIGINS',
         'SEAHUB__ALLOWED_HOSTS',
-        'SEAHUB__VIRUS_SCAN_NOTIFY_LIST',
-        'SEAHUB__REST_FRAMEWORK_THROTTING_WHITELIST',
     ]
 
     for key, value in variables.items():
@@ -347,6 +447,10 @@ LOGGING = {
         if key.startswith('SEAHUB__SAML_ATTRIBUTE_MAPPING__'):
             continue
 
+        # Ignore variables for throttle rates (see generate_rest_framework_settings())
+        if key.startswith('SEAHUB__REST_FRAMEWORK_THROTTLE_RATES__'):
+            continue
+
         parts = key.split('__')
 
         if len(parts) != 2:
@@ -362,6 +466,11 @@ LOGGING = {
             lines.append(f'{key} = {repr(tuple(value.split(",")))}')
             continue
 
+        # Handle comma-separated lists
+        if key in ['VIRUS_SCAN_NOTIFY_LIST', 'REST_FRAMEWORK_THROTTING_WHITELIST']:
+            lines.append(f'{key} = {repr([item.strip() for item in value.split(",") if item.strip()])}')
+            continue
+
         # Determine variable type
         if value.lower() in ['true', 'false']:
             # Boolean
@@ -387,10 +496,18 @@ LOGGING = {
 
         file.write(f'CSRF_TRUSTED_ORIGINS = ["{get_proto()}://{os.environ.get("SEAFILE_SERVER_HOSTNAME")}"]\n')
 
+        if os.environ.get('SEAHUB__COMPRESS_OFFLINE', 'false').lower() == 'true':
+            file.write(compress_offline_template % get_offline_context())
+            file.write('\n')
+
         saml_attribute_mapping = generate_saml_attribute_mapping()
         if len(saml_attribute_mapping) > 0:
             file.write(f'SAML_ATTRIBUTE_MAPPING = {repr(saml_attribute_mapping)}\n')
 
+        rest_framework = generate_rest_framework_settings()
+        if len(rest_framework) > 0:
+            file.write(f'REST_FRAMEWORK = {repr(rest_framework)}\n')
+
         if os.environ.get('SEAFILE_LOG_TO_STDOUT', 'false') == 'true':
             file.write(logging_template % logging_config)
             file.write('\n')
@@ -417,6 +534,44 @@ LOGGING = {
                     overrides.read(),
                 ])
 
+# Returns the list of cache servers ("host:port")
+# CACHE_SERVERS (comma-separated) takes precedence over SEAHUB__CACHE_HOST/SEAHUB__CACHE_PORT
+def get_cache_servers(default_host: str) -> list[str]:
+    if os.environ.get('CACHE_SERVERS') is None:
+        return [f'{os.environ.get("SEAHUB__CACHE_HOST", default_host)}:{os.environ.get("SEAHUB__CACHE_PORT", "11211")}']
+
+    servers = []
+    for server in os.environ['CACHE_SERVERS'].split(','):
+        server = server.strip()
+        if not server:
+            continue
+        if ':' not in server:
+            server = f'{server}:11211'
+        servers.append(server)
+
+    if len(servers) == 0:
+        logger.error('Error: Variable "CACHE_SERVERS" does not contain any servers')
+        sys.exit(1)
+
+    return servers
+
+# Generates the value of "memcached_options" inside seafile.conf (libmemcached configuration string)
+# The connection pool is sized according to the number of threads that can access memcached at the same time
+def generate_memcached_options(servers: list[str]) -> str:
+    concurrency = GUNICORN_WORKERS
+    for key in ['SEAFILE__fileserver__worker_threads', 'SEAFILE__fileserver__max_indexing_threads', 'SEAFILE__fileserver__max_index_processing_threads']:
+        value = get_conf_value(key)
+        if not value.isdigit():
+            logger.error('Error: Invalid value for variable "%s": "%s" (must be a number)', key, value)
+            sys.exit(1)
+        concurrency += int(value)
+
+    options = [f'--SERVER={server}' for server in servers]
+    options.append(f'--POOL-MIN={concurrency}')
+    options.append(f'--POOL-MAX={concurrency * 5}')
+
+    return ' '.join(options)
+
 def generate_saml_attribute_mapping() -> dict[str, tuple[str]]:
     saml_attribute_mapping = {}
 
@@ -428,6 +583,46 @@ def generate_saml_attribute_mapping() -> dict[str, tuple[str]]:
 
     return saml_attribute_mapping
 
+# Returns the REST_FRAMEWORK setting of seahub if any throttle rate is overridden or rate limiting is enabled
+# Throttle rates are set through SEAHUB__REST_FRAMEWORK_THROTTLE_RATES__<scope> (e.g. SEAHUB__REST_FRAMEWORK_THROTTLE_RATES__anon=30/minute)
+def generate_rest_framework_settings() -> dict:
+    prefix = 'SEAHUB__REST_FRAMEWORK_THROTTLE_RATES__'
+    throttle_rates = {key.removeprefix(prefix): value for key, value in os.environ.items() if key.startswith(prefix)}
+
+    rate_limit_enabled = get_nginx_setting('NGINX_RATE_LIMIT_ENABLED').lower() == 'true'
+    whitelist_enabled = os.environ.get('SEAHUB__REST_FRAMEWORK_THROTTING_WHITELIST', '').strip() != ''
+    if len(throttle_rates) == 0 and not rate_limit_enabled and not whitelist_enabled:
+        return {}
+
+    for scope, rate in throttle_rates.items():
+        # Django REST framework only uses the first character of the period
+        if not re.fullmatch(r'\d+/[smhd][a-z]*', rate):
+            logger.error('Error: Invalid value for variable "%s%s": "%s" (must be e.g. "60/minute")', prefix, scope, rate)
+            sys.exit(1)
+
+    settings = {
+        'DEFAULT_THROTTLE_RATES': {**SEAHUB_THROTTLE_RATES, **throttle_rates},
+        'UNICODE_JSON': False,
+    }
+
+    # NGINX replaces the address of trusted proxies with the client address, which it appends to X-Forwarded-For
+    # Clients are then identified by the last address (this is what REST_FRAMEWORK_THROTTING_WHITELIST is compared with)
+    if is_real_ip_enabled():
+        settings['NUM_PROXIES'] = 1
+    elif whitelist_enabled:
+        logger.warning('Warning: REST_FRAMEWORK_THROTTING_WHITELIST has no effect since NGINX_TRUSTED_PROXIES is empty')
+
+    return settings
+
+def get_trusted_proxies() -> list[str]:
+    return [item.strip() for item in get_nginx_setting('NGINX_TRUSTED_PROXIES').split(',') if item.strip()]
+
+# NGINX takes the client address from X-Forwarded-For if it is needed to identify clients (rate limiting or the throttling whitelist)
+def is_real_ip_enabled() -> bool:
+    if len(get_trusted_proxies()) == 0:
+        return False
+    return get_nginx_setting('NGINX_RATE_LIMIT_ENABLED').lower() == 'true' or os.environ.get('SEAHUB__REST_FRAMEWORK_THROTTING_WHITELIST', '').strip() != ''
+
 def generate_nginx_conf_file(path: str):
     config_template = """
 # Required for only office document server
@@ -441,11 +636,22 @@ map $http_x_forwarded_host $the_host {
     "" $host;
 }
 
+# An empty Connection header allows connections to the document server to be kept alive
 map $http_upgrade $proxy_connection {
     default upgrade;
-    "" close;
+    "" "";
+}
+%(cache_zones)s%(limit_zones)s
+upstream seafhttp {
+    server 127.0.0.1:%(seafhttp_port)s;
+    keepalive %(seafhttp_keepalive)s;
 }
 
+upstream seafdav {
+    server 127.0.0.1:%(seafdav_port)s;
+    keepalive %(seafdav_keepalive)s;
+}
+%(onlyoffice_upstream)s
 server {
     %(listen_ipv6_directive)s
     listen 80;
@@ -465,19 +671,28 @@ server {
         proxy_set_header Connection "";
         proxy_http_version 1.1;
 
-        client_max_body_size 0;
+        client_max_body_size 0;%(api_limits)s
         access_log      /var/log/nginx/seahub.access.log seafileformat;
         error_log       /var/log/nginx/seahub.error.log;
     }
-
+%(avatar_location)s
     location /seafhttp {
         rewrite ^/seafhttp(.*)$ $1 break;
-        proxy_pass http://127.0.0.1:8082;
+        proxy_pass http://seafhttp;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
         proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
-        client_max_body_size 0;
-        proxy_connect_timeout  36000s;
-        proxy_read_timeout  36000s;
+        client_max_body_size 0;%(seafhttp_limits)s
+        proxy_connect_timeout  %(seafhttp_timeout)s;
+        proxy_read_timeout  %(seafhttp_timeout)s;
+        proxy_send_timeout  %(seafhttp_timeout)s;
         proxy_request_buffering off;
+
+        # Downloads
+        proxy_buffering %(seafhttp_buffering)s;
+        proxy_buffer_size %(seafhttp_buffer_size)s;
+        proxy_buffers %(seafhttp_buffers)s;
+        proxy_max_temp_file_size %(seafhttp_max_temp_file_size)s;
         access_log      /var/log/nginx/seafhttp.access.log seafileformat;
         error_log       /var/log/nginx/seafhttp.error.log;
     }
@@ -493,19 +708,29 @@ server {
         proxy_http_version 1.1;
         proxy_set_header Upgrade $http_upgrade;
         proxy_set_header Connection "upgrade";
+        # Clients keep their websocket connections open; events must not be held back by buffering
+        proxy_read_timeout %(notification_timeout)s;
+        proxy_send_timeout %(notification_timeout)s;
+        proxy_buffering off;%(notification_limits)s
         access_log      /var/log/nginx/notification.access.log seafileformat;
         error_log       /var/log/nginx/notification.error.log;
     }
 
     location /seafdav {
-        proxy_pass         http://127.0.0.1:8080;
+        proxy_pass         http://seafdav;
+        proxy_http_version 1.1;
+        proxy_set_header   Connection "";
         proxy_set_header   Host $host;
         proxy_set_header   X-Real-IP $remote_addr;
         proxy_set_header   X-Forwarded-For $proxy_add_x_forwarded_for;
         proxy_set_header   X-Forwarded-Host $server_name;
         proxy_set_header   X-Forwarded-Proto $scheme;
-        proxy_read_timeout  1200s;
-        client_max_body_size 0;
+        proxy_read_timeout  %(seafdav_timeout)ss;
+        client_max_body_size 0;%(seafdav_limits)s
+
+        # Pass uploads to seafdav while they are being received instead of writing them to disk first
+        proxy_request_buffering off;
+        proxy_max_temp_file_size %(seafdav_max_temp_file_size)s;
 
         access_log      /var/log/nginx/seafdav.access.log seafileformat;
         error_log       /var/log/nginx/seafdav.error.log;
@@ -539,7 +764,7 @@ server {
 
         proxy_set_header X-Forwarded-Proto $the_scheme;
         proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
-    }
+%(onlyoffice_cache)s    }
 }
 """
 
@@ -556,11 +781,22 @@ map $http_x_forwarded_host $the_host {
     "" $host;
 }
 
+# An empty Connection header allows connections to the document server to be kept alive
 map $http_upgrade $proxy_connection {
     default upgrade;
-    "" close;
+    "" "";
+}
+%(cache_zones)s%(limit_zones)s
+upstream seafhttp {
+    server 127.0.0.1:%(seafhttp_port)s;
+    keepalive %(seafhttp_keepalive)s;
 }
 
+upstream seafdav {
+    server 127.0.0.1:%(seafdav_port)s;
+    keepalive %(seafdav_keepalive)s;
+}
+%(onlyoffice_upstream)s
 server {
     %(listen_ipv6_directive)s
     listen 80;
@@ -580,19 +816,28 @@ server {
         proxy_set_header Connection "";
         proxy_http_version 1.1;
 
-        client_max_body_size 0;
+        client_max_body_size 0;%(api_limits)s
         access_log /dev/stdout seafileformat;
         error_log /dev/stdout;
     }
-
+%(avatar_location)s
     location /seafhttp {
         rewrite ^/seafhttp(.*)$ $1 break;
-        proxy_pass http://127.0.0.1:8082;
+        proxy_pass http://seafhttp;
+        proxy_http_version 1.1;
+        proxy_set_header Connection "";
         proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
-        client_max_body_size 0;
-        proxy_connect_timeout  36000s;
-        proxy_read_timeout  36000s;
+        client_max_body_size 0;%(seafhttp_limits)s
+        proxy_connect_timeout  %(seafhttp_timeout)s;
+        proxy_read_timeout  %(seafhttp_timeout)s;
+        proxy_send_timeout  %(seafhttp_timeout)s;
         proxy_request_buffering off;
+
+        # Downloads
+        proxy_buffering %(seafhttp_buffering)s;
+        proxy_buffer_size %(seafhttp_buffer_size)s;
+        proxy_buffers %(seafhttp_buffers)s;
+        proxy_max_temp_file_size %(seafhttp_max_temp_file_size)s;
         access_log /dev/stdout seafileformat;
         error_log /dev/stdout;
     }
@@ -608,19 +853,29 @@ server {
         proxy_http_version 1.1;
         proxy_set_header Upgrade $http_upgrade;
         proxy_set_header Connection "upgrade";
+        # Clients keep their websocket connections open; events must not be held back by buffering
+        proxy_read_timeout %(notification_timeout)s;
+        proxy_send_timeout %(notification_timeout)s;
+        proxy_buffering off;%(notification_limits)s
         access_log /dev/stdout seafileformat;
         error_log /dev/stdout;
     }
 
     location /seafdav {
-        proxy_pass         http://127.0.0.1:8080;
+        proxy_pass         http://seafdav;
+        proxy_http_version 1.1;
+        proxy_set_header   Connection "";
         proxy_set_header   Host $host;
         proxy_set_header   X-Real-IP $remote_addr;
         proxy_set_header   X-Forwarded-For $proxy_add_x_forwarded_for;
         proxy_set_header   X-Forwarded-Host $server_name;
         proxy_set_header   X-Forwarded-Proto $scheme;
-        proxy_read_timeout  1200s;
-        client_max_body_size 0;
+        proxy_read_timeout  %(seafdav_timeout)ss;
+        client_max_body_size 0;%(seafdav_limits)s
+
+        # Pass uploads to seafdav while they are being received instead of writing them to disk first
+        proxy_request_buffering off;
+        proxy_max_temp_file_size %(seafdav_max_temp_file_size)s;
 
         access_log /dev/stdout seafileformat;
         error_log /dev/stdout;
@@ -654,18 +909,72 @@ server {
 
         proxy_set_header X-Forwarded-Proto $the_scheme;
         proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
-
+%(onlyoffice_cache)s
         access_log /dev/stdout seafileformat;
         error_log /dev/stdout;
     }
 }
 """
 
+    # Used as "proxy_read_timeout <timeout>s" and by seafdav's gunicorn (seconds)
+    seafdav_timeout = get_conf_value('SEAFDAV__WEBDAV__timeout')
+    if not seafdav_timeout.isdigit():
+        logger.error('Error: Invalid value for variable "%s": "%s" (must be a number)', 'SEAFDAV__WEBDAV__timeout', seafdav_timeout)
+        sys.exit(1)
+
     config = {
         'server_name': os.environ.get('SEAFILE_SERVER_HOSTNAME'),
         'listen_ipv6_directive': 'listen [::]:80;' if os.environ.get('ENABLE_IPV6', 'true').lower() == 'true' else '',
+        'cache_zones': '',
+        'limit_zones': '',
+        'api_limits': '',
+        'seafhttp_limits': '',
+        'seafdav_limits': '',
+        'notification_limits': '',
+        'avatar_location': '',
+        'onlyoffice_upstream': '',
+        'onlyoffice_cache': '',
+        'notification_timeout': get_nginx_setting('NGINX_NOTIFICATION_TIMEOUT'),
+        'seafhttp_port': get_conf_value('SEAFILE__fileserver__port'),
+        'seafhttp_keepalive': get_nginx_setting('NGINX_SEAFHTTP_KEEPALIVE'),
+        'seafhttp_timeout': get_nginx_setting('NGINX_SEAFHTTP_TIMEOUT'),
+        'seafhttp_buffering': get_nginx_setting('NGINX_SEAFHTTP_BUFFERING'),
+        'seafhttp_buffer_size': get_nginx_setting('NGINX_SEAFHTTP_BUFFER_SIZE'),
+        'seafhttp_buffers': get_nginx_setting('NGINX_SEAFHTTP_BUFFERS'),
+        'seafhttp_max_temp_file_size': get_nginx_setting('NGINX_SEAFHTTP_MAX_TEMP_FILE_SIZE'),
+        'seafdav_port': get_conf_value('SEAFDAV__WEBDAV__port'),
+        'seafdav_timeout': seafdav_timeout,
+        'seafdav_keepalive': get_nginx_setting('NGINX_SEAFDAV_KEEPALIVE'),
+        'seafdav_max_temp_file_size': get_nginx_setting('NGINX_SEAFDAV_MAX_TEMP_FILE_SIZE'),
     }
 
+    if get_nginx_setting('NGINX_AVATAR_CACHE_ENABLED').lower() == 'true':
+        cache_zone, config['avatar_location'] = generate_nginx_avatar_cache_config()
+        config['cache_zones'] += cache_zone
+
+    if get_nginx_setting('NGINX_ONLYOFFICE_CACHE_ENABLED').lower() == 'true':
+        cache_zone, config['onlyoffice_cache'] = generate_nginx_onlyoffice_cache_config()
+        config['cache_zones'] += cache_zone
+
+    if is_real_ip_enabled():
+        config['limit_zones'] += generate_nginx_real_ip_config()
+
+    if get_nginx_setting('NGINX_RATE_LIMIT_ENABLED').lower() == 'true':
+        limit_zones, location_limits = generate_nginx_rate_limit_config()
+        config['limit_zones'] += limit_zones
+        for name, directives in location_limits.items():
+            config[f'{name}_limits'] = directives
+
+    # The upstream group takes precedence over the DNS lookup in the /onlyofficeds/ location (same name),
+    # but requires the document server to be resolvable whenever NGINX is (re)loaded (otherwise NGINX rejects the whole file)
+    if get_nginx_setting('NGINX_ONLYOFFICE_UPSTREAM_ENABLED').lower() == 'true':
+        config['onlyoffice_upstream'] = f"""
+upstream onlyoffice {{
+    server onlyoffice:80;
+    keepalive {get_nginx_setting('NGINX_ONLYOFFICE_KEEPALIVE')};
+}}
+"""
+
     if not os.path.exists(path):
         logger.info(f'Generating {os.path.basename(path)} since it does not exist yet')
     else:
@@ -677,6 +986,193 @@ server {
         # Use lstrip() to remove leading whitespace
         file.write(config_template.lstrip() % config)
 
+# Updates the worker settings inside the main NGINX configuration file (part of the container image)
+# These directives are not allowed inside the http context, which is where seafile.nginx.conf is included
+def update_nginx_main_conf_file(path: str):
+    worker_connections = get_nginx_setting('NGINX_WORKER_CONNECTIONS')
+    worker_rlimit_nofile = get_nginx_setting('NGINX_WORKER_RLIMIT_NOFILE')
+
+    for key, value in [('NGINX_WORKER_CONNECTIONS', worker_connections), ('NGINX_WORKER_RLIMIT_NOFILE', worker_rlimit_nofile)]:
+        if not value.isdigit():
+            logger.error('Error: Invalid value for variable "%s": "%s" (must be a number)', key, value)
+            sys.exit(1)
+
+    with open(path, 'r') as file:
+        content = file.read()
+
+    content, count = re.subn(r'worker_connections\s+\d+;', f'worker_connections {worker_connections};', content)
+    if count == 0:
+        logger.warning('Could not find "worker_connections" inside %s', path)
+
+    content, count = re.subn(r'^worker_rlimit_nofile\s+\d+;', f'worker_rlimit_nofile {worker_rlimit_nofile};', content, flags=re.MULTILINE)
+    if count == 0:
+        content = f'worker_rlimit_nofile {worker_rlimit_nofile};\n' + content
+
+    logger.info(f'Updating {os.path.basename(path)}')
+
+    with open(path, 'w') as file:
+        file.write(content)
+
+def get_nginx_log_directives(name: str) -> str:
+    if os.environ.get('SEAFILE_LOG_TO_STDOUT', 'false').lower() == 'true':
+        return """
+        access_log /dev/stdout seafileformat;
+        error_log /dev/stdout;"""
+
+    return f"""
+        access_log      /var/log/nginx/{name}.access.log seafileformat;
+        error_log       /var/log/nginx/{name}.error.log;"""
+
+# Returns the rate limiting zones (http context) and the limit_req/limit_conn directives for each location
+# Requests above the limits are rejected with "429 Too Many Requests"
+def generate_nginx_rate_limit_config() -> tuple[str, dict[str, str]]:
+    zones_template = """
+# Rate limiting per client address (NGINX_RATE_LIMIT_ENABLED)
+limit_req_status 429;
+limit_conn_status 429;
+
+# Only API requests are limited inside "location /" (an empty key is not limited)
+map $uri $seafile_api_limit_key {
+    default "";
+    "~^/api(2|/v2\\.1)/" $binary_remote_addr;
+}
+%(zones)s"""
+
+    zones = ''
+    location_limits = {}
+
+    for name in ['api', 'seafhttp', 'seafdav', 'notification']:
+        rate = get_nginx_setting(f'NGINX_RATE_LIMIT_{name.upper()}')
+        burst = get_nginx_setting(f'NGINX_RATE_LIMIT_{name.upper()}_BURST')
+        connections = get_nginx_setting(f'NGINX_CONN_LIMIT_{name.upper()}')
+
+        if not re.fullmatch(r'\d+r/[sm]', rate):
+            logger.error('Error: Invalid value for variable "%s": "%s" (must be e.g. "10r/s" or "600r/m")', f'NGINX_RATE_LIMIT_{name.upper()}', rate)
+            sys.exit(1)
+
+        for key, value in [(f'NGINX_RATE_LIMIT_{name.upper()}_BURST', burst), (f'NGINX_CONN_LIMIT_{name.upper()}', connections)]:
+            if not value.isdigit():
+                logger.error('Error: Invalid value for variable "%s": "%s" (must be a number)', key, value)
+                sys.exit(1)
+
+        key = '$seafile_api_limit_key' if name == 'api' else '$binary_remote_addr'
+        zones += f'limit_req_zone {key} zone=seafile_{name}:10m rate={rate};\n'
+        zones += f'limit_conn_zone {key} zone=seafile_{name}_conn:10m;\n'
+
+        # Requests within the burst are passed on immediately instead of being delayed
+        location_limits[name] = f"""
+        limit_req zone=seafile_{name} burst={burst} nodelay;
+        limit_conn seafile_{name}_conn {connections};"""
+
+    zones_config = {
+        'zones': zones,
+    }
+
+    return zones_template % zones_config, location_limits
+
+# Returns the directives (http context) that take the client address from X-Forwarded-For of trusted proxies
+# Otherwise, all requests that are passed on by a reverse proxy (e.g. Caddy) share the proxy's address
+def generate_nginx_real_ip_config() -> str:
+    directives = '\n# Client addresses of requests passed on by a reverse proxy (NGINX_TRUSTED_PROXIES)\n'
+    directives += ''.join(f'set_real_ip_from {proxy};\n' for proxy in get_trusted_proxies())
+    directives += 'real_ip_header X-Forwarded-For;\nreal_ip_recursive on;\n'
+    return directives
+
+# Returns the cache zone (http context) and the location block (server context)
+# that cache avatars served by seahub's image view
+def generate_nginx_avatar_cache_config() -> tuple[str, str]:
+    cache_zone_template = """
+# Avatars are read from the database and decoded by seahub on every request
+proxy_cache_path %(cache_path)s levels=1:2 keys_zone=seafile_avatars:10m max_size=%(max_size)s inactive=7d use_temp_path=off;
+"""
+
+    location_template = """
+    location /image-view/ {
+        proxy_pass http://127.0.0.1:8000;
+        proxy_set_header Host $http_host;
+        proxy_set_header Forwarded "for=$remote_addr;proto=$scheme";
+        proxy_set_header X-Forwarded-For $proxy_add_x_forwarded_for;
+        proxy_set_header X-Forwarded-Proto $scheme;
+        proxy_set_header X-Real-IP $remote_addr;
+        proxy_set_header Connection "";
+        proxy_http_version 1.1;
+
+        # Cache by URL since it contains the avatar's filename (its MD5 hash is the primary key
+        # of the "avatar_uploaded" table); replaced avatars are picked up once an entry expires
+        proxy_cache seafile_avatars;
+        proxy_cache_key $request_uri;
+        proxy_cache_valid 200 %(valid)s;
+        proxy_cache_lock on;
+        proxy_cache_background_update on;
+        proxy_cache_use_stale error timeout updating http_500 http_502 http_503 http_504;
+
+        # seahub does not send any caching headers for avatars
+        proxy_ignore_headers Set-Cookie Cache-Control Expires Vary;
+        proxy_hide_header Set-Cookie;
+        add_header X-Cache-Status $upstream_cache_status;
+%(log_directives)s
+    }
+"""
+
+    cache_path = os.path.join(NGINX_CACHE_DIR, 'avatars')
+
+    # nginx does not create missing parent directories of a cache path
+    os.makedirs(cache_path, exist_ok=True)
+
+    cache_zone_config = {
+        'cache_path': cache_path,
+        'max_size': get_nginx_setting('NGINX_AVATAR_CACHE_MAX_SIZE'),
+    }
+
+    location_config = {
+        'valid': get_nginx_setting('NGINX_AVATAR_CACHE_VALID'),
+        'log_directives': get_nginx_log_directives('seahub'),
+    }
+
+    return cache_zone_template % cache_zone_config, location_template % location_config
+
+# Returns the cache zone (http context) and the directives for the /onlyofficeds/ location
+# that cache the document server's static files
+def generate_nginx_onlyoffice_cache_config() -> tuple[str, str]:
+    cache_zone_template = """
+# Static files of the OnlyOffice document server
+proxy_cache_path %(cache_path)s levels=1:2 keys_zone=seafile_onlyoffice:10m max_size=%(max_size)s inactive=30d use_temp_path=off;
+
+# api.js is requested without a version in its path and must not be cached (it references the versioned files)
+map $request_uri $onlyoffice_no_cache {
+    default 1;
+    "~/api/documents/api\\.js" 1;
+    "~^/onlyofficeds/(?:[^/]+/)?(?:web-apps|sdkjs|sdkjs-plugins|fonts|dictionaries)/" 0;
+}
+"""
+
+    location_directives_template = """
+        proxy_cache seafile_onlyoffice;
+        proxy_cache_key $request_uri;
+        proxy_cache_valid 200 %(valid)s;
+        proxy_cache_lock on;
+        proxy_cache_use_stale error timeout updating;
+        proxy_no_cache $onlyoffice_no_cache;
+        proxy_cache_bypass $onlyoffice_no_cache;
+        add_header X-Cache-Status $upstream_cache_status;
+"""
+
+    cache_path = os.path.join(NGINX_CACHE_DIR, 'onlyoffice')
+
+    # nginx does not create missing parent directories of a cache path
+    os.makedirs(cache_path, exist_ok=True)
+
+    cache_zone_config = {
+        'cache_path': cache_path,
+        'max_size': get_nginx_setting('NGINX_ONLYOFFICE_CACHE_MAX_SIZE'),
+    }
+
+    location_directives_config = {
+        'valid': get_nginx_setting('NGINX_ONLYOFFICE_CACHE_VALID'),
+    }
+
+    return cache_zone_template % cache_zone_config, location_directives_template % location_directives_config
+
 if __name__ == '__main__':
     if not os.path.exists(CONFIG_DIR):
         os.makedirs(CONFIG_DIR)
@@ -687,6 +1183,13 @@ if __name__ == '__main__':
             logger.error('Error: Variable "%s" must be provided', variable)
             sys.exit(1)
 
+    if os.environ.get('VIRUS_SCAN_ENABLED', 'false').lower() == 'true':
+        DEFAULT_VALUES.update(VIRUS_SCAN_DEFAULT_VALUES)
+
+    # CACHE_SERVERS configures memcached for seahub and seaf-server at the same time
+    if os.environ.get('CACHE_SERVERS') is not None and os.environ.get('SEAHUB__CACHE_BACKEND', 'memcached') == 'memcached':
+        DEFAULT_VALUES['SEAFILE__memcached__memcached_options'] = generate_memcached_options(get_cache_servers(default_host='memcached'))
+
     generate_conf_file(path=CCNET_CONF_PATH, prefix='CCNET__')
     generate_conf_file(path=SEAFDAV_CONF_PATH, prefix='SEAFDAV__')
     generate_conf_file(path=SEAFEVENTS_CONF_PATH, prefix='SEAFEVENTS__')
@@ -696,3 +1199,4 @@ if __name__ == '__main__':
     generate_seahub_settings_file(path=SEAHUB_SETTINGS_PATH)
 
     generate_nginx_conf_file(path=NGINX_CONF_PATH)
+    update_nginx_main_conf_file(path=NGINX_MAIN_CONF_PATH)
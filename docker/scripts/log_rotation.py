@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+
+"""
+Rotates the log files inside /opt/seafile/logs by size and age. Used by start.py (which calls
+LogRotator.check() while watching the controller) or run standalone in cluster setups.
+
+Log files of services that reopen their logs on a signal are renamed and the service is signaled
+(same signals as the logrotate configuration of the base image). All other log files are copied into
+the compressed file and truncated afterwards, since their services keep writing into the renamed file.
+Compression runs inside a background thread with a low priority and a limited rate.
+"""
+
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import signal
+import sys
+import threading
+import time
+
+logger = logging.getLogger('log-rotation')
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+LOGS_DIR = '/opt/seafile/logs'
+PIDS_DIR = '/opt/seafile/pids'
+STATE_FILE_NAME = '.rotation-state.json'
+
+# Seconds to wait after a log file has been reopened before compressing the rotated file (in-flight writes)
+REOPEN_GRACE = 5
+# gunicorn's graceful_timeout (default, not set in gunicorn.conf.py) plus REOPEN_GRACE
+GUNICORN_GRACE = 30 + REOPEN_GRACE
+
+# Services that reopen their log files when receiving a signal (pid file, signal, grace period, log files)
+# Log files that are not reopened within REOPEN_TIMEOUT fall back to copy and truncate
+SIGNALED_SERVICES = [
+    ('seaf-server.pid', signal.SIGUSR1, REOPEN_GRACE, ['seafile.log', 'slow_logs/seafile_slow_rpc.log', 'slow_logs/seafile_slow_storage.log']),
+    ('fileserver.pid', signal.SIGUSR1, REOPEN_GRACE, ['fileserver.log', 'fileserver-error.log', 'slow_logs/fileserver_slow_storage.log']),
+    # gunicorn reopens its own log files and restarts the workers (which reopen seahub.log) on SIGHUP
+    # The old workers keep writing into the rotated files until they have finished their requests
+    ('seahub.pid', signal.SIGHUP, GUNICORN_GRACE, ['seahub.log', 'onlyoffice.log']),
+]
+
+DEFAULT_VALUES = {
+    'SEAFILE_LOG_ROTATION_MAX_SIZE': '100m',
+    'SEAFILE_LOG_ROTATION_INTERVAL': '1d',
+    'SEAFILE_LOG_ROTATION_KEEP': '7',
+    'SEAFILE_LOG_ROTATION_RATE': '20m',
+}
+
+# Seconds between two checks of the log files
+SCAN_INTERVAL = 30
+REOPEN_TIMEOUT = 60
+# Rotated files that are still open after this many seconds are compressed anyway
+CLOSE_TIMEOUT = 600
+
+CHUNK_SIZE = 1024 * 1024
+
+# Suffix of rotated files; also matches the files created by logrotate (dateext with ".%Y-%m-%d")
+ROTATED_SUFFIX_PATTERN = r'\.\d{4}-\d{2}-\d{2}(-\d{6})?(\.gz)?'
+
+def parse_size(value: str) -> int:
+    units = {'k': 1024, 'm': 1024 ** 2, 'g': 1024 ** 3}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+def parse_duration(value: str) -> int:
+    units = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+    value = value.strip().lower()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+def parse_keep(value: str) -> tuple[int, dict[str, int]]:
+    # "7" or "7,seahub.log=14,slow_logs/seafile_slow_rpc.log=2" (default and per-file limits)
+    default = None
+    files = {}
+    for item in value.split(','):
+        item = item.strip()
+        if '=' in item:
+            name, count = item.split('=', 1)
+            files[name.strip()] = int(count)
+        elif item:
+            default = int(item)
+    if default is None:
+        default = int(DEFAULT_VALUES['SEAFILE_LOG_ROTATION_KEEP'])
+    if default < 0 or any(count < 0 for count in files.values()):
+        raise ValueError(f'invalid number of rotated files: {value}')
+    return default, files
+
+def is_file_open(path: str) -> bool:
+    # Returns True if any process has the file open (always False if /proc is not available)
+    try:
+        pids = [entry for entry in os.listdir('/proc') if entry.isdigit()]
+    except OSError:
+        return False
+
+    for pid in pids:
+        fd_dir = os.path.join('/proc', pid, 'fd')
+        try:
+            for fd in os.listdir(fd_dir):
+                if os.readlink(os.path.join(fd_dir, fd)) == path:
+                    return True
+        except OSError:
+            # The process has exited in the meantime or is not accessible
+            continue
+    return False
+
+def read_pid(path: str) -> int | None:
+    try:
+        with open(path, 'r') as file:
+            return int(file.read().strip())
+    except (OSError, ValueError):
+        return None
+
+class Compressor(threading.Thread):
+    """
+    Runs copy/compress jobs one after another. The thread lowers its own priority (on Linux, this
+    also lowers its I/O priority unless an I/O scheduling class has been set) and limits its rate.
+    """
+
+    def __init__(self, rate: int):
+        super().__init__(name='log-compressor', daemon=True)
+        self.rate = rate
+        self.jobs = queue.Queue()
+
+    def submit(self, job, *args):
+        self.jobs.put((job, args))
+
+    def run(self):
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+
+        while True:
+            job, args = self.jobs.get()
+            try:
+                job(*args)
+            except Exception as e:
+                logger.error('Log rotation job failed: %s', e)
+
+    def copy(self, source, target_path: str, size: int | None = None) -> int:
+        # Compresses the source file object into target_path (up to size bytes or EOF), limited to self.rate bytes/s
+        copied = 0
+        start = time.monotonic()
+        with gzip.open(target_path, 'wb', compresslevel=6) as target:
+            while size is None or copied < size:
+                data = source.read(CHUNK_SIZE if size is None else min(CHUNK_SIZE, size - copied))
+                if not data:
+                    break
+                target.write(data)
+                copied += len(data)
+
+                delay = copied / self.rate - (time.monotonic() - start)
+                if delay > 0:
+                    time.sleep(delay)
+        return copied
+
+class LogRotator:
+    def __init__(self, max_size: int, interval: int, keep: int, rate: int, keep_files: dict[str, int] | None = None,
+                 logs_dir: str = LOGS_DIR, pids_dir: str = PIDS_DIR):
+        self.max_size = max_size
+        self.interval = interval
+        self.keep = keep
+        # Number of rotated files to keep per log file (path relative to logs_dir)
+        self.keep_files = keep_files or {}
+        self.logs_dir = logs_dir
+        self.pids_dir = pids_dir
+        self.state_path = os.path.join(logs_dir, STATE_FILE_NAME)
+
+        self.services = {}
+        for pid_file, signum, grace, names in SIGNALED_SERVICES:
+            for name in names:
+                self.services[os.path.join(logs_dir, name)] = (os.path.join(pids_dir, pid_file), signum, grace)
+
+        # Log file => (rotated file, time of the signal, grace period) for rotated files that are not compressed yet
+        self.pending: dict[str, tuple[str, float, int]] = {}
+        # Log files that were not reopened after a signal
+        self.not_reopened: set[str] = set()
+
+        self.state: dict[str, float] = {}
+        self.last_scan = 0.0
+        self.started = False
+        self.compressor = Compressor(rate)
+
+    def check(self):
+        now = time.time()
+        if now - self.last_scan < SCAN_INTERVAL:
+            return
+        self.last_scan = now
+
+        if not os.path.isdir(self.logs_dir):
+            return
+
+        # Errors must not stop the caller (the process watching the seafile controller)
+        try:
+            self.scan(now)
+        except OSError as e:
+            logger.error('Log rotation failed: %s', e)
+
+    def scan(self, now: float):
+        if not self.started:
+            self.start()
+
+        self.check_pending(now)
+
+        # Service (pid file, signal, grace period) => rotated log files; every service is signaled once per scan
+        renamed: dict[tuple[str, int, int], list[tuple[str, str]]] = {}
+
+        for path in self.get_log_files():
+            if path in self.pending:
+                continue
+
+            key = os.path.relpath(path, self.logs_dir)
+            last_rotation = self.state.setdefault(key, now)
+            size = os.path.getsize(path)
+
+            if size >= self.max_size or (size > 0 and now - last_rotation >= self.interval):
+                self.rotate(path, now, renamed)
+                self.state[key] = now
+
+        for service, files in renamed.items():
+            self.signal(service, files, now)
+
+        self.save_state()
+
+    def start(self):
+        self.started = True
+        self.compressor.start()
+
+        try:
+            with open(self.state_path, 'r') as file:
+                self.state = json.load(file)
+        except (OSError, ValueError):
+            self.state = {}
+
+        # Compress rotated files that were left behind by a previous run (e.g. container restart)
+        for path in self.get_log_files():
+            directory, name = os.path.split(path)
+            for entry in os.listdir(directory):
+                if entry.startswith(name + '.') and entry.endswith('.gz.tmp'):
+                    os.unlink(os.path.join(directory, entry))
+                elif re.fullmatch(re.escape(name) + r'\.\d{4}-\d{2}-\d{2}-\d{6}', entry):
+                    self.compressor.submit(self.compress, path, os.path.join(directory, entry))
+
+    def save_state(self):
+        try:
+            with open(self.state_path, 'w') as file:
+                json.dump(self.state, file)
+        except OSError as e:
+            logger.warning('Could not save the log rotation state: %s', e)
+
+    def get_log_files(self) -> list[str]:
+        paths = []
+        for directory in [self.logs_dir, os.path.join(self.logs_dir, 'slow_logs')]:
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, name)
+                # Symbolic links point to /dev/stdout if SEAFILE_LOG_TO_STDOUT is enabled
+                if name.endswith('.log') and os.path.isfile(path) and not os.path.islink(path):
+                    paths.append(path)
+        return paths
+
+    def rotate(self, path: str, now: float, renamed: dict[tuple[str, int, int], list[tuple[str, str]]]):
+        rotated_path = f'{path}.{time.strftime("%Y-%m-%d-%H%M%S", time.localtime(now))}'
+        service = self.services.get(path)
+
+        if service is None or path in self.not_reopened:
+            logger.info('Rotating %s (copy and truncate)', os.path.basename(path))
+            self.compressor.submit(self.copy_truncate, path, rotated_path + '.gz')
+            return
+
+        logger.info('Rotating %s', os.path.basename(path))
+        os.rename(path, rotated_path)
+        renamed.setdefault(service, []).append((path, rotated_path))
+
+    def signal(self, service: tuple[str, int, int], files: list[tuple[str, str]], now: float):
+        pid_path, signum, grace = service
+
+        pid = read_pid(pid_path)
+        if pid is not None:
+            try:
+                os.kill(pid, signum)
+                for path, rotated_path in files:
+                    self.pending[path] = (rotated_path, now, grace)
+                return
+            except ProcessLookupError:
+                pass
+
+        # Nobody is writing into the rotated files if the service is not running
+        for path, rotated_path in files:
+            self.compressor.submit(self.compress, path, rotated_path)
+
+    def check_pending(self, now: float):
+        for path, (rotated_path, signaled, grace) in list(self.pending.items()):
+            if os.path.exists(path):
+                # Processes that have not exited yet (e.g. gunicorn workers finishing their requests) still write into the rotated file
+                if now - signaled < grace:
+                    continue
+                if is_file_open(rotated_path):
+                    if now - signaled < CLOSE_TIMEOUT:
+                        continue
+                    logger.warning('%s is still open after %d seconds, compressing it anyway', os.path.basename(rotated_path), CLOSE_TIMEOUT)
+                del self.pending[path]
+                self.compressor.submit(self.compress, path, rotated_path)
+            elif now - signaled >= REOPEN_TIMEOUT:
+                logger.warning('%s has not been reopened after the signal, using copy and truncate instead', os.path.basename(path))
+                del self.pending[path]
+                self.not_reopened.add(path)
+                os.rename(rotated_path, path)
+                self.compressor.submit(self.copy_truncate, path, rotated_path + '.gz')
+
+    def compress(self, path: str, rotated_path: str):
+        with open(rotated_path, 'rb') as source:
+            self.compressor.copy(source, rotated_path + '.gz.tmp')
+        os.rename(rotated_path + '.gz.tmp', rotated_path + '.gz')
+        os.unlink(rotated_path)
+        self.remove_old_files(path)
+
+    def copy_truncate(self, path: str, target_path: str):
+        # Copies the file directly into the compressed file (instead of an uncompressed copy first)
+        # and truncates it right after reaching its end in order to lose as few lines as possible
+        with open(path, 'rb') as source:
+            self.compressor.copy(source, target_path + '.tmp')
+            os.truncate(path, 0)
+        os.rename(target_path + '.tmp', target_path)
+        self.remove_old_files(path)
+
+    def remove_old_files(self, path: str):
+        directory, name = os.path.split(path)
+        keep = self.keep_files.get(os.path.relpath(path, self.logs_dir), self.keep)
+        pattern = re.compile(re.escape(name) + ROTATED_SUFFIX_PATTERN)
+        rotated = sorted(entry for entry in os.listdir(directory) if pattern.fullmatch(entry))
+        for entry in rotated[:-keep] if keep > 0 else rotated:
+            os.unlink(os.path.join(directory, entry))
+
+def get_log_rotator() -> LogRotator | None:
+    # Returns None if the logs are not rotated by this module
+    if os.environ.get('SEAFILE_LOG_TO_STDOUT', 'false').lower() == 'true':
+        return None
+    if os.environ.get('SEAFILE_LOG_ROTATION', 'internal').lower() != 'internal':
+        return None
+
+    values = {key: os.environ.get(key, default) for key, default in DEFAULT_VALUES.items()}
+    try:
+        keep, keep_files = parse_keep(values['SEAFILE_LOG_ROTATION_KEEP'])
+        settings = {
+            'max_size': parse_size(values['SEAFILE_LOG_ROTATION_MAX_SIZE']),
+            'interval': parse_duration(values['SEAFILE_LOG_ROTATION_INTERVAL']),
+            'keep': keep,
+            'keep_files': keep_files,
+            'rate': parse_size(values['SEAFILE_LOG_ROTATION_RATE']),
+        }
+        if settings['max_size'] <= 0 or settings['interval'] <= 0 or settings['rate'] <= 0:
+            raise ValueError('size, interval and rate must be positive')
+    except ValueError as e:
+        logger.error('Log rotation is disabled due to an invalid setting: %s', e)
+        return None
+
+    return LogRotator(**settings)
+
+if __name__ == '__main__':
+    log_rotator = get_log_rotator()
+    if log_rotator is None:
+        sys.exit(0)
+
+    while True:
+        log_rotator.check()
+        time.sleep(5)
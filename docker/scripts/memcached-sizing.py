@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+
+"""
+Recommends the memory limit of memcached (-m, MEMCACHED_MEMORY) based on its statistics.
+Connects to every server inside CACHE_SERVERS (or the servers passed as arguments).
+
+The recommendation is based on the share of stored items that are evicted before they expire (evictions
+against item turnover). By default, the counters since the start of memcached are used; --interval compares two
+samples instead, which reflects the current load (e.g. during working hours).
+
+    docker exec seafile /scripts/memcached-sizing.py
+    docker exec seafile /scripts/memcached-sizing.py --interval 600
+    docker exec seafile /scripts/memcached-sizing.py memcached:11211 --json
+"""
+
+import argparse
+import json
+import math
+import os
+import socket
+import sys
+import time
+
+# Headroom added on top of the estimated working set
+HEADROOM = 1.25
+
+# The recommendation (including the headroom) is at most this factor of the current limit (run the script again after raising the limit)
+MAX_GROWTH = 2.0
+
+# Recommendations are rounded up to a multiple of this value (in MB)
+ROUND_TO_MB = 64
+
+def get_stats(server: str, timeout: float) -> dict[str, str]:
+    host, _, port = server.rpartition(':')
+    if not host:
+        host, port = server, '11211'
+
+    with socket.create_connection((host, int(port)), timeout=timeout) as connection:
+        connection.sendall(b'stats\r\n')
+
+        reply = b''
+        while not reply.endswith(b'END\r\n'):
+            data = connection.recv(4096)
+            if not data:
+                break
+            reply += data
+
+    stats = {}
+    for line in reply.decode('utf-8', errors='replace').splitlines():
+        parts = line.split(' ', 2)
+        if len(parts) == 3 and parts[0] == 'STAT':
+            stats[parts[1]] = parts[2]
+
+    if not stats:
+        raise ConnectionError(f'Unexpected reply: {reply[:100]!r}')
+
+    return stats
+
+def get_counter(stats: dict[str, str], previous: dict[str, str] | None, name: str) -> int:
+    # Counter since the previous sample (or since the start of memcached)
+    value = int(stats.get(name, 0))
+    if previous is not None:
+        value -= int(previous.get(name, 0))
+    return max(value, 0)
+
+def analyze(server: str, stats: dict[str, str], previous: dict[str, str] | None = None) -> dict:
+    limit = int(stats['limit_maxbytes'])
+    used = int(stats['bytes'])
+    items = int(stats['curr_items'])
+    uptime = max(int(stats['uptime']), 1)
+    seconds = max(uptime - int(previous['uptime']), 1) if previous is not None else uptime
+
+    hits = get_counter(stats, previous, 'get_hits')
+    misses = get_counter(stats, previous, 'get_misses')
+    evictions = get_counter(stats, previous, 'evictions')
+    # Items that were evicted without ever being read did not cost a cache hit
+    evicted_unfetched = get_counter(stats, previous, 'evicted_unfetched')
+    stored = get_counter(stats, previous, 'total_items')
+
+    # Share of the stored items that were evicted although they would have been read
+    # Both counters grow with the load, so the ratio does not depend on the uptime or the length of the interval
+    evicted_ratio = min((evictions - evicted_unfetched) / stored, 1.0) if stored > 0 else 0.0
+
+    if evictions > 0:
+        # Keeping these items requires roughly the same share of additional memory
+        working_set = limit * (1 + evicted_ratio)
+        recommended = min(working_set * HEADROOM, limit * MAX_GROWTH)
+    else:
+        # A cache that has never been full (e.g. shortly after a restart) does not show how much memory it needs
+        recommended = max(used * HEADROOM, limit)
+
+    recommended_mb = max(ROUND_TO_MB, math.ceil(recommended / 1024 ** 2 / ROUND_TO_MB) * ROUND_TO_MB)
+
+    return {
+        'server': server,
+        'version': stats.get('version'),
+        'uptime_hours': round(uptime / 3600, 1),
+        'limit_mb': round(limit / 1024 ** 2),
+        'used_mb': round(used / 1024 ** 2, 1),
+        'fill_ratio': round(used / limit, 3) if limit else 0.0,
+        'items': items,
+        'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else None,
+        'evictions': evictions,
+        'evictions_per_hour': round(evictions / seconds * 3600, 1),
+        'evicted_ratio': round(evicted_ratio, 3),
+        'recommended_mb': recommended_mb,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('servers', nargs='*', help='Memcached servers (host[:port]); default is CACHE_SERVERS or memcached:11211')
+    parser.add_argument('--interval', type=float, default=0, help='Seconds between two samples (default: use the counters since the start of memcached)')
+    parser.add_argument('--timeout', type=float, default=5.0)
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    servers = args.servers or [server.strip() for server in os.environ.get('CACHE_SERVERS', 'memcached:11211').split(',') if server.strip()]
+
+    previous = {}
+    results = []
+    for sample in ['previous', 'current'] if args.interval > 0 else ['current']:
+        if sample == 'current' and previous:
+            time.sleep(args.interval)
+
+        for server in servers:
+            try:
+                stats = get_stats(server, args.timeout)
+                if sample == 'previous':
+                    previous[server] = stats
+                else:
+                    results.append(analyze(server, stats, previous.get(server)))
+            except (OSError, KeyError, ValueError) as e:
+                print(f'{server}: Failed to get statistics: {e}', file=sys.stderr)
+                return 1
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    for result in results:
+        hit_ratio = f'{result["hit_ratio"]:.1%}' if result['hit_ratio'] is not None else 'n/a'
+        print(f'{result["server"]} (memcached {result["version"]}, up {result["uptime_hours"]}h)')
+        print(f'  Memory:    {result["used_mb"]}/{result["limit_mb"]} MB ({result["fill_ratio"]:.1%})')
+        print(f'  Items:     {result["items"]}')
+        print(f'  Hit ratio: {hit_ratio}')
+        print(f'  Evictions: {result["evictions"]} ({result["evictions_per_hour"]}/h, {result["evicted_ratio"]:.1%} of the stored items)')
+        print(f'  Recommended: MEMCACHED_MEMORY={result["recommended_mb"]}')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,15 @@
+"""
+Settings of django-compressor's offline mode shared by generate-config-files.py and compress-static.py.
+"""
+
+import os
+
+# Returns the template context that seahub uses at runtime (defaults of seahub/settings.py unless overridden)
+# The offline manifest is keyed by the rendered templates, so COMPRESS_OFFLINE_CONTEXT and the context
+# that the files have been compressed with must both be based on this function
+def get_offline_context() -> dict[str, str]:
+    return {
+        'MEDIA_URL': os.environ.get('SEAHUB__MEDIA_URL', '/media/'),
+        'STATIC_URL': os.environ.get('SEAHUB__STATIC_URL', '/media/assets/'),
+        'SITE_ROOT': os.environ.get('SEAHUB__SITE_ROOT', '/'),
+    }
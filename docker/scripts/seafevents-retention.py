@@ -0,0 +1,483 @@
+#!/usr/bin/env python3
+
+"""
+Limits the size of the tables that seafevents writes to (audit logs, statistics, file history and activities).
+
+Commands:
+  report     Show the size, the number of rows and the oldest entry of every table
+  partition  Convert the large tables to monthly range partitions (one-time operation, copies the whole table)
+  prune      Remove entries older than the retention period: expired partitions are dropped (or moved into an
+             archive database), all other rows are deleted in small batches
+
+The database credentials are read from seafevents.conf.
+
+    /scripts/seafevents-retention.py report
+    /scripts/seafevents-retention.py partition --dry-run
+    /scripts/seafevents-retention.py prune --days 365 --keep statistics=730
+"""
+
+import argparse
+import configparser
+import json
+import logging
+import os
+import re
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+import pymysql
+
+logger = logging.getLogger('seafevents-retention')
+logger.setLevel(logging.DEBUG)
+logger.addHandler(logging.StreamHandler(sys.stdout))
+
+SEAFEVENTS_CONF_PATH = '/opt/seafile/conf/seafevents.conf'
+
+# Tables written by seafevents, grouped by the feature they belong to
+# Tables with "partition" set are append-only and large enough to benefit from partitioning
+# Tables that reference (or are referenced by) a foreign key can't be partitioned
+# UserActivity comes before Activity since deleting activities cascades to UserActivity
+TABLES = {
+    'FileAudit': {'column': 'timestamp', 'group': 'audit', 'partition': True},
+    'FileUpdate': {'column': 'timestamp', 'group': 'audit', 'partition': True},
+    'PermAudit': {'column': 'timestamp', 'group': 'audit', 'partition': True},
+    'FileHistory': {'column': 'timestamp', 'group': 'file-history', 'partition': True},
+    'UserActivity': {'column': 'timestamp', 'group': 'activity', 'partition': False},
+    'Activity': {'column': 'timestamp', 'group': 'activity', 'partition': False},
+    'FileOpsStat': {'column': 'timestamp', 'group': 'statistics', 'partition': True},
+    'UserTraffic': {'column': 'timestamp', 'group': 'statistics', 'partition': True},
+    'SysTraffic': {'column': 'timestamp', 'group': 'statistics', 'partition': False},
+    'MonthlyUserTraffic': {'column': 'timestamp', 'group': 'statistics', 'partition': False},
+    'MonthlySysTraffic': {'column': 'timestamp', 'group': 'statistics', 'partition': False},
+    'TotalStorageStat': {'column': 'timestamp', 'group': 'statistics', 'partition': False},
+    'UserActivityStat': {'column': 'timestamp', 'group': 'statistics', 'partition': False},
+}
+
+GROUPS = sorted(set(table['group'] for table in TABLES.values()))
+
+# Partitions created by this script are named after the month they contain (e.g. "p202401")
+PARTITION_NAME_PATTERN = re.compile(r'^p(\d{4})(\d{2})$')
+MAXVALUE_PARTITION = 'pmax'
+
+# Number of monthly partitions that are created in advance
+FUTURE_PARTITIONS = 3
+
+def get_database_config(path: str) -> dict:
+    if not os.path.exists(path):
+        logger.error('Error: %s does not exist', path)
+        sys.exit(1)
+
+    config = configparser.ConfigParser()
+    config.read(path)
+
+    if not config.has_section('DATABASE'):
+        logger.error('Error: %s does not contain a [DATABASE] section', os.path.basename(path))
+        sys.exit(1)
+
+    section = config['DATABASE']
+    return {
+        'host': section.get('host', 'mariadb'),
+        'port': section.getint('port', 3306),
+        'user': section.get('username', 'root'),
+        'password': section.get('password', ''),
+        'database': section.get('name', 'seahub_db'),
+    }
+
+def connect(config: dict) -> pymysql.Connection:
+    try:
+        # Autocommit keeps every batch in its own (small) transaction
+        return pymysql.connect(host=config['host'], port=config['port'], user=config['user'], passwd=config['password'], db=config['database'], autocommit=True)
+    except Exception as e:
+        logger.error('Failed to connect to mysql server using user "%s" and password "***": %s', config['user'], e)
+        sys.exit(1)
+
+def query(connection: pymysql.Connection, sql: str, args=None) -> list[dict]:
+    with connection.cursor(pymysql.cursors.DictCursor) as cursor:
+        cursor.execute(sql, args)
+        return cursor.fetchall()
+
+def execute(connection: pymysql.Connection, sql: str, dry_run: bool, args=None) -> int:
+    if dry_run:
+        logger.info('[dry-run] %s', sql if args is None else sql % tuple(connection.escape(arg) for arg in args))
+        return 0
+
+    logger.debug('%s', sql if args is None else sql % tuple(connection.escape(arg) for arg in args))
+    with connection.cursor() as cursor:
+        return cursor.execute(sql, args)
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+def next_month(day: date) -> date:
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+def partition_name(month: date) -> str:
+    return f'p{month.year:04d}{month.month:02d}'
+
+def partition_definition(month: date) -> str:
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{next_month(month).isoformat()}'))"
+
+def get_table_info(connection: pymysql.Connection, database: str) -> dict[str, dict]:
+    tables = {}
+    rows = query(connection, 'SELECT TABLE_NAME, TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH, DATA_FREE, AVG_ROW_LENGTH FROM information_schema.TABLES WHERE TABLE_SCHEMA = %s', (database,))
+    for row in rows:
+        if row['TABLE_NAME'] in TABLES:
+            tables[row['TABLE_NAME']] = {
+                'rows': row['TABLE_ROWS'] or 0,
+                'size': (row['DATA_LENGTH'] or 0) + (row['INDEX_LENGTH'] or 0),
+                'free': row['DATA_FREE'] or 0,
+                'avg_row_length': row['AVG_ROW_LENGTH'] or 0,
+                'partitions': [],
+            }
+
+    # Skip tables whose schema differs from the expected one (e.g. older seafevents versions)
+    rows = query(connection, 'SELECT TABLE_NAME, COLUMN_NAME FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = %s', (database,))
+    columns = set((row['TABLE_NAME'], row['COLUMN_NAME']) for row in rows)
+    for table in list(tables):
+        if (table, TABLES[table]['column']) not in columns:
+            logger.warning('Skipping "%s" since it does not contain column "%s"', table, TABLES[table]['column'])
+            del tables[table]
+
+    rows = query(connection, 'SELECT TABLE_NAME, PARTITION_NAME, TABLE_ROWS, DATA_LENGTH, INDEX_LENGTH FROM information_schema.PARTITIONS '
+                             'WHERE TABLE_SCHEMA = %s AND PARTITION_NAME IS NOT NULL ORDER BY TABLE_NAME, PARTITION_ORDINAL_POSITION', (database,))
+    for row in rows:
+        if row['TABLE_NAME'] in tables:
+            tables[row['TABLE_NAME']]['partitions'].append({
+                'name': row['PARTITION_NAME'],
+                'rows': row['TABLE_ROWS'] or 0,
+                'size': (row['DATA_LENGTH'] or 0) + (row['INDEX_LENGTH'] or 0),
+            })
+
+    return tables
+
+def get_oldest_entry(connection: pymysql.Connection, table: str) -> datetime | None:
+    column = TABLES[table]['column']
+    rows = query(connection, f'SELECT MIN(`{column}`) AS oldest FROM `{table}`')
+    return rows[0]['oldest'] if rows else None
+
+def count_expired_rows(connection: pymysql.Connection, table: str, cutoff: datetime, since: datetime) -> int:
+    column = TABLES[table]['column']
+    rows = query(connection, f'SELECT COUNT(*) AS count FROM `{table}` WHERE `{column}` >= %s AND `{column}` < %s', (since, cutoff))
+    return rows[0]['count']
+
+def get_partitioning_problems(connection: pymysql.Connection, database: str, table: str) -> list[str]:
+    # Returns the reasons why a table can't be partitioned by its timestamp column
+    problems = []
+    column = TABLES[table]['column']
+
+    rows = query(connection, 'SELECT TABLE_NAME, REFERENCED_TABLE_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS '
+                             'WHERE CONSTRAINT_SCHEMA = %s AND (TABLE_NAME = %s OR REFERENCED_TABLE_NAME = %s)', (database, table, table))
+    if rows:
+        problems.append('partitioned tables do not support foreign keys')
+
+    # Every unique key (except for the primary key, which is extended) must contain the partitioning column
+    rows = query(connection, 'SELECT INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS '
+                             'WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND NON_UNIQUE = 0 ORDER BY INDEX_NAME, SEQ_IN_INDEX', (database, table))
+    unique_keys: dict[str, list[str]] = {}
+    for row in rows:
+        unique_keys.setdefault(row['INDEX_NAME'], []).append(row['COLUMN_NAME'])
+    for name, columns in unique_keys.items():
+        if name != 'PRIMARY' and column not in columns:
+            problems.append(f'unique key "{name}" does not contain column "{column}"')
+
+    return problems
+
+def get_primary_key(connection: pymysql.Connection, database: str, table: str) -> list[str]:
+    rows = query(connection, 'SELECT COLUMN_NAME FROM information_schema.STATISTICS '
+                             "WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s AND INDEX_NAME = 'PRIMARY' ORDER BY SEQ_IN_INDEX", (database, table))
+    return [row['COLUMN_NAME'] for row in rows]
+
+def partition_table(connection: pymysql.Connection, database: str, table: str, info: dict, dry_run: bool) -> bool:
+    column = TABLES[table]['column']
+
+    if info['partitions']:
+        logger.info('"%s" is already partitioned', table)
+        return False
+
+    problems = get_partitioning_problems(connection, database, table)
+    if problems:
+        logger.warning('Not partitioning "%s": %s', table, ', '.join(problems))
+        return False
+
+    # One partition per month, starting with the month of the oldest entry
+    oldest = get_oldest_entry(connection, table)
+    month = month_start(oldest.date() if oldest else date.today())
+    last_month = month_start(date.today())
+    for _ in range(FUTURE_PARTITIONS):
+        last_month = next_month(last_month)
+
+    definitions = []
+    while month <= last_month:
+        definitions.append(partition_definition(month))
+        month = next_month(month)
+    definitions.append(f'PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE')
+
+    # The primary key must contain the partitioning column
+    alter = ''
+    primary_key = get_primary_key(connection, database, table)
+    if column not in primary_key:
+        columns = ', '.join(f'`{name}`' for name in primary_key + [column])
+        alter = f'DROP PRIMARY KEY, ADD PRIMARY KEY ({columns}) '
+
+    logger.info('Partitioning "%s" (%d rows, %d partitions); this copies the whole table', table, info['rows'], len(definitions))
+
+    start = time.monotonic()
+    execute(connection, f'ALTER TABLE `{table}` {alter}PARTITION BY RANGE (TO_DAYS(`{column}`)) ({", ".join(definitions)})', dry_run)
+    if not dry_run:
+        logger.info('Partitioned "%s" in %.1f seconds', table, time.monotonic() - start)
+
+    return True
+
+def add_future_partitions(connection: pymysql.Connection, table: str, info: dict, dry_run: bool):
+    # New rows must not end up inside the MAXVALUE partition, since it can't be dropped by month
+    names = [partition['name'] for partition in info['partitions']]
+    if MAXVALUE_PARTITION not in names:
+        return
+
+    months = [date(int(match.group(1)), int(match.group(2)), 1) for match in map(PARTITION_NAME_PATTERN.match, names) if match]
+    month = next_month(max(months)) if months else month_start(date.today())
+
+    last_month = month_start(date.today())
+    for _ in range(FUTURE_PARTITIONS):
+        last_month = next_month(last_month)
+
+    definitions = []
+    while month <= last_month:
+        definitions.append(partition_definition(month))
+        month = next_month(month)
+
+    if not definitions:
+        return
+
+    definitions.append(f'PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE')
+    logger.info('Adding %d partitions to "%s"', len(definitions) - 1, table)
+    execute(connection, f'ALTER TABLE `{table}` REORGANIZE PARTITION {MAXVALUE_PARTITION} INTO ({", ".join(definitions)})', dry_run)
+
+def is_empty(connection: pymysql.Connection, source: str) -> bool:
+    return not query(connection, f'SELECT 1 FROM {source} LIMIT 1')
+
+def archive_partition(connection: pymysql.Connection, database: str, table: str, partition: str, archive_database: str, dry_run: bool):
+    # Every step is skipped if it has already been completed by a previous (interrupted) run
+    archive_table = f'{table}_{partition}'
+    rows = query(connection, 'SELECT PARTITION_NAME FROM information_schema.PARTITIONS WHERE TABLE_SCHEMA = %s AND TABLE_NAME = %s', (archive_database, archive_table))
+
+    if not rows:
+        execute(connection, f'CREATE TABLE `{archive_database}`.`{archive_table}` LIKE `{database}`.`{table}`', dry_run)
+    if not rows or any(row['PARTITION_NAME'] is not None for row in rows):
+        execute(connection, f'ALTER TABLE `{archive_database}`.`{archive_table}` REMOVE PARTITIONING', dry_run)
+
+    if not rows or is_empty(connection, f'`{archive_database}`.`{archive_table}`'):
+        execute(connection, f'ALTER TABLE `{database}`.`{table}` EXCHANGE PARTITION {partition} WITH TABLE `{archive_database}`.`{archive_table}`', dry_run)
+    elif is_empty(connection, f'`{database}`.`{table}` PARTITION ({partition})'):
+        logger.info('Partition "%s" of "%s" has already been moved into "%s"."%s"', partition, table, archive_database, archive_table)
+    else:
+        logger.error('Error: Both partition "%s" of "%s" and "%s"."%s" contain rows', partition, table, archive_database, archive_table)
+        sys.exit(1)
+
+def drop_expired_partitions(connection: pymysql.Connection, database: str, table: str, info: dict, cutoff: datetime,
+                            archive_database: str | None, dry_run: bool) -> tuple[int, int, datetime]:
+    # Returns the number of rows and bytes of the removed partitions and the date up to which rows have been removed
+    rows = 0
+    size = 0
+    removed_until = datetime.min
+
+    for partition in info['partitions']:
+        match = PARTITION_NAME_PATTERN.match(partition['name'])
+        if not match:
+            continue
+
+        # Only partitions that end before the cutoff can be removed as a whole
+        end = next_month(date(int(match.group(1)), int(match.group(2)), 1))
+        if end > cutoff.date():
+            continue
+
+        if archive_database:
+            logger.info('Moving partition "%s" of "%s" (%d rows) into "%s"."%s_%s"', partition['name'], table, partition['rows'], archive_database, table, partition['name'])
+            archive_partition(connection, database, table, partition['name'], archive_database, dry_run)
+        else:
+            logger.info('Dropping partition "%s" of "%s" (%d rows)', partition['name'], table, partition['rows'])
+
+        execute(connection, f'ALTER TABLE `{database}`.`{table}` DROP PARTITION {partition["name"]}', dry_run)
+
+        rows += partition['rows']
+        size += partition['size']
+        removed_until = max(removed_until, datetime.combine(end, datetime.min.time()))
+
+    return rows, size, removed_until
+
+def delete_expired_rows(connection: pymysql.Connection, table: str, cutoff: datetime, removed_until: datetime,
+                        batch_size: int, pause: float, dry_run: bool) -> int:
+    # Small batches keep the transactions (and Galera write-sets) short, the pause lets replication catch up
+    column = TABLES[table]['column']
+
+    if dry_run:
+        # Rows inside partitions that would have been removed are not counted twice
+        expired = count_expired_rows(connection, table, cutoff, since=removed_until)
+        if expired > 0:
+            execute(connection, f'DELETE FROM `{table}` WHERE `{column}` < %s LIMIT %s', dry_run, (cutoff, batch_size))
+            logger.info('[dry-run] Would delete %d rows from "%s" in %d batches', expired, table, -(-expired // batch_size))
+        return expired
+
+    deleted = 0
+    while True:
+        with connection.cursor() as cursor:
+            affected_rows = cursor.execute(f'DELETE FROM `{table}` WHERE `{column}` < %s LIMIT %s', (cutoff, batch_size))
+        deleted += affected_rows
+        if affected_rows < batch_size:
+            break
+        time.sleep(pause)
+
+    if deleted > 0:
+        logger.info('Deleted %d rows from "%s"', deleted, table)
+
+    return deleted
+
+def parse_retention(days: int, keep: list[str]) -> dict[str, int]:
+    retention = {group: days for group in GROUPS}
+    for item in ','.join(keep).split(','):
+        item = item.strip()
+        if not item:
+            continue
+        group, _, value = item.partition('=')
+        if group not in retention or not value.isdigit():
+            logger.error('Error: Invalid retention "%s" (expected GROUP=DAYS with GROUP being one of %s)', item, ', '.join(GROUPS))
+            sys.exit(1)
+        retention[group] = int(value)
+    return retention
+
+def format_size(size: int) -> str:
+    return f'{size / 1024 ** 2:.1f} MB'
+
+def command_report(connection: pymysql.Connection, database: str, args) -> list[dict]:
+    tables = get_table_info(connection, database)
+    results = []
+    for table in TABLES:
+        if table not in tables:
+            continue
+        info = tables[table]
+        oldest = get_oldest_entry(connection, table)
+        results.append({
+            'table': table,
+            'group': TABLES[table]['group'],
+            # TABLE_ROWS is an estimate for InnoDB tables
+            'rows': info['rows'],
+            'size': info['size'],
+            'free': info['free'],
+            'partitions': len(info['partitions']),
+            'oldest': oldest.isoformat() if oldest else None,
+        })
+
+    if not args.json:
+        print(f'{"Table":<20} {"Group":<14} {"Rows (est.)":>12} {"Size":>12} {"Free":>12} {"Partitions":>10}  Oldest entry')
+        for result in results:
+            print(f'{result["table"]:<20} {result["group"]:<14} {result["rows"]:>12} {format_size(result["size"]):>12} {format_size(result["free"]):>12} {result["partitions"]:>10}  {result["oldest"] or "-"}')
+
+    return results
+
+def command_partition(connection: pymysql.Connection, database: str, args) -> list[dict]:
+    tables = get_table_info(connection, database)
+    results = []
+    for table, definition in TABLES.items():
+        if not definition['partition'] or table not in tables:
+            continue
+        if args.tables and table not in args.tables:
+            continue
+        if partition_table(connection, database, table, tables[table], args.dry_run):
+            results.append({'table': table, 'rows': tables[table]['rows'], 'size': tables[table]['size']})
+    return results
+
+def command_prune(connection: pymysql.Connection, database: str, args) -> list[dict]:
+    retention = parse_retention(args.days, args.keep)
+
+    if args.archive_database:
+        execute(connection, f'CREATE DATABASE IF NOT EXISTS `{args.archive_database}`', args.dry_run)
+
+    tables = get_table_info(connection, database)
+    results = []
+    for table in TABLES:
+        if table not in tables:
+            continue
+        if args.tables and table not in args.tables:
+            continue
+
+        info = tables[table]
+        days = retention[TABLES[table]['group']]
+        cutoff = datetime.combine(date.today() - timedelta(days=days), datetime.min.time())
+
+        start = time.monotonic()
+        partition_rows, partition_size, removed_until = 0, 0, datetime.min
+        if info['partitions']:
+            add_future_partitions(connection, table, info, args.dry_run)
+            partition_rows, partition_size, removed_until = drop_expired_partitions(connection, database, table, info, cutoff, args.archive_database, args.dry_run)
+
+        # Rows inside the partially expired partition (or all expired rows of tables without partitions)
+        deleted = delete_expired_rows(connection, table, cutoff, removed_until, args.batch_size, args.pause, args.dry_run)
+
+        results.append({
+            'table': table,
+            'retention_days': days,
+            'cutoff': cutoff.isoformat(),
+            'partition_rows': partition_rows,
+            'deleted_rows': deleted,
+            # Space of dropped partitions is returned to the file system; space of deleted rows is only reused by InnoDB
+            'reclaimed_bytes': partition_size,
+            'reusable_bytes': deleted * info['avg_row_length'],
+            'seconds': round(time.monotonic() - start, 3),
+        })
+
+    if not args.json:
+        prefix = '[dry-run] ' if args.dry_run else ''
+        for result in results:
+            if result['partition_rows'] or result['deleted_rows']:
+                print(f'{prefix}{result["table"]}: {result["partition_rows"]} rows in partitions ({format_size(result["reclaimed_bytes"])} reclaimed), '
+                      f'{result["deleted_rows"]} rows deleted (~{format_size(result["reusable_bytes"])} reusable)')
+        print(f'{prefix}Total: {sum(r["partition_rows"] + r["deleted_rows"] for r in results)} rows, '
+              f'{format_size(sum(r["reclaimed_bytes"] for r in results))} reclaimed, ~{format_size(sum(r["reusable_bytes"] for r in results))} reusable')
+
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--config', default=SEAFEVENTS_CONF_PATH, help='Path to seafevents.conf')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('report', help='Show the size of the seafevents tables')
+
+    partition_parser = subparsers.add_parser('partition', help='Convert the large tables to monthly partitions')
+    partition_parser.add_argument('--tables', nargs='+', choices=[table for table, definition in TABLES.items() if definition['partition']])
+    partition_parser.add_argument('--dry-run', action='store_true', help='Only print the statements')
+
+    prune_parser = subparsers.add_parser('prune', help='Remove expired entries')
+    prune_parser.add_argument('--days', type=int, required=True, help='Retention period in days')
+    prune_parser.add_argument('--keep', action='append', default=[], help=f'Retention per group (GROUP=DAYS, comma-separated); groups: {", ".join(GROUPS)}')
+    prune_parser.add_argument('--tables', nargs='+', choices=list(TABLES))
+    prune_parser.add_argument('--archive-database', help='Move expired partitions into this database instead of dropping them')
+    prune_parser.add_argument('--batch-size', type=int, default=1000, help='Number of rows deleted per transaction')
+    prune_parser.add_argument('--pause', type=float, default=0.1, help='Seconds to wait between two batches')
+    prune_parser.add_argument('--dry-run', action='store_true', help='Only print the statements')
+
+    args = parser.parse_args()
+
+    if args.json:
+        # Keep stdout parseable
+        logger.handlers[0].setStream(sys.stderr)
+
+    config = get_database_config(args.config)
+    connection = connect(config)
+
+    commands = {'report': command_report, 'partition': command_partition, 'prune': command_prune}
+    try:
+        results = commands[args.command](connection, config['database'], args)
+    except pymysql.err.MySQLError as e:
+        logger.error('Error: %s', e)
+        sys.exit(1)
+    finally:
+        connection.close()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+if __name__ == '__main__':
+    main()
@@ -18,6 +18,7 @@ from utils import (
 )
 from upgrade import check_upgrade
 from bootstrap import init_seafile_server
+from log_rotation import get_log_rotator
 
 
 shared_seafiledir = '/shared/seafile'
@@ -29,6 +30,7 @@ topdir = dirname(installdir)
 def watch_controller():
     maxretry = 4
     retry = 0
+    log_rotator = get_log_rotator()
     while retry < maxretry:
         controller_pid = get_command_output('ps aux | grep seafile-controller | grep -v grep || true').strip()
         garbage_collector_pid = get_command_output('ps aux | grep /scripts/gc.sh | grep -v grep || true').strip()
@@ -36,6 +38,8 @@ def watch_controller():
             retry += 1
         else:
             retry = 0
+        if log_rotator is not None:
+            log_rotator.check()
         time.sleep(5)
     print('seafile controller exited unexpectedly.')
     sys.exit(1)